@@ -1,42 +1,84 @@
+#!/usr/bin/env python3
+"""
+Gaudi Connection Tool
+
+Single command-line entry point: discovers Gaudi devices, resolves the
+connection pairs from the connectivity file and optionally runs perf_test
+on each pair through PerfRunner (see RealRunConnection).
+"""
+
 import os
 import json
 import argparse
+import logging
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'src')))
-from connection import GaudiDevices, GaudiRouting, connection, print_connection_pairs, print_gaudi_device_mapping, verify_connections_vs_csv
-from runner.PerfRunner import PerfRunner
+from connection import GaudiDevices, get_routing, connection, print_connection_pairs, print_gaudi_device_mapping, verify_connections_vs_csv
+from runner.PerfRunner import PerfRunner, perf_test_available, plan_rounds, run_round
+
+try:
+    import orjson
+except ImportError:
+    # Optional speedup; the json module produces the same output
+    orjson = None
+
+log = logging.getLogger('gaudi_conn')
 
+PERF_TEST = "/opt/habanalabs/perf-test/perf_test"
 
-def connection_perftest(src_device, dst_device):
+
+def get_gid(device, port):
     """
-    Run performance test between source and destination Gaudi devices using perf_test.
+    Get the GID for a device port, falling back to a device-level gid attribute.
     Args:
-        src_device: GaudiDevice object (source)
-        dst_device: GaudiDevice object (destination)
-        src_port: Port number for source device
-        dst_port: Port number for destination device
+        device: GaudiDevice object
+        port: Port number on the device
     Returns:
-        Dict with test results or None if test could not be performed
+        GID string or None if not available
     """
-    import subprocess
-    import os
-    def get_gid(device, port):
-        # Try to get GID from device.ports dict if available
-        if hasattr(device, 'ports') and isinstance(device.ports, dict):
-            port_info = device.ports.get(port)
-            if port_info:
-                return port_info.get('gid')
-        return getattr(device, 'gid', None)
+    if hasattr(device, 'ports') and isinstance(device.ports, dict):
+        port_info = device.ports.get(port)
+        if port_info:
+            return getattr(port_info, 'gid', None)
+    return getattr(device, 'gid', None)
+
 
-    # These will be passed in as arguments in the new RealRunConnection
-    return None  # Placeholder, see RealRunConnection for new logic
+def dumps_json(data):
+    """
+    Serialize data to an indented JSON string.
+    Args:
+        data: JSON-serializable object
+    Returns:
+        JSON text
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(data, indent=2)
+
+
+def save_json(data, filename):
+    """
+    Write data to a JSON file, indented for reading.
+    Args:
+        data: JSON-serializable object
+        filename: Output file path
+    """
+    if orjson is not None:
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(filename, 'w') as f:
+            json.dump(data, f, indent=2)
 
 
-def RealRunConnection(connections):
+def RealRunConnection(connections, max_parallel=1, **runner_options):
     """
     Executes performance tests on all the provided (src_device, src_port, dst_device, dst_port) tuples and collects results.
     Args:
         connections: List of (src_device, src_port, dst_device, dst_port) tuples
+        max_parallel: Maximum number of connections tested at the same time; connections
+                      sharing a device port are never tested together
+        runner_options: Extra PerfRunner settings (e.g. test_type, size, iterations)
     Returns:
         Dict with summary and detailed results for each connection
     """
@@ -44,91 +86,84 @@ def RealRunConnection(connections):
     success_count = 0
     failure_count = 0
     error_count = 0
-    print(f"\nRunning performance tests on {len(connections)} connections...")
+    log.info("Running performance tests on %d connections...", len(connections))
     
-    # Create a single PerfRunner instance that will be reused for all connections
-    perf_runner = PerfRunner(log_dir="connection_test_logs")
+    # Settings shared by the per-connection runners
+    perf_runner = PerfRunner(log_dir="connection_test_logs", **runner_options)
+    verbose = log.isEnabledFor(logging.INFO)
+    perf_ok = perf_test_available(PERF_TEST)
     
+    jobs = []
     for i, (src, src_port, dst, dst_port) in enumerate(connections):
-        print(f"\nConnection {i+1}/{len(connections)}")
+        log.info("Connection %d/%d", i + 1, len(connections))
         if not src or not dst:
-            print("Error: Connection missing source or destination device")
+            log.error("Connection missing source or destination device")
             error_count += 1
             continue
         
         src_ib_name = getattr(src, 'ib_name', None)
         dst_ib_name = getattr(dst, 'ib_name', None)
         
-        # Try to get GID from device.ports dict if available
-        def get_gid(device, port):
-            if hasattr(device, 'ports') and isinstance(device.ports, dict):
-                port_info = device.ports.get(port)
-                if port_info:
-                    return port_info.get('gid')
-            return getattr(device, 'gid', None)
-        
         src_gid = get_gid(src, src_port)
         dst_gid = get_gid(dst, dst_port)
         
-        print(f"Testing connection from {src_ib_name}:port{src_port} to {dst_ib_name}:port{dst_port}")
+        log.info("Testing connection from %s:port%s to %s:port%s", src_ib_name, src_port, dst_ib_name, dst_port)
         
         if not src_gid or not dst_gid:
-            print(f"Warning: Missing GIDs for connection. Source GID: {src_gid}, Destination GID: {dst_gid}")
+            log.warning("Missing GIDs for connection. Source GID: %s, Destination GID: %s", src_gid, dst_gid)
         
         # Check if perf_test exists
-        perf_test = "/opt/habanalabs/perf-test/perf_test"
-        if not os.path.exists(perf_test) or not os.access(perf_test, os.X_OK):
-            print(f"Error: perf_test utility not found at {perf_test} or not executable")
+        if not perf_ok:
+            log.error("perf_test utility not found at %s or not executable", PERF_TEST)
             error_count += 1
             continue
         
-        # Configure PerfRunner for this specific connection
-        perf_runner.server_ib_dev = src_ib_name
-        perf_runner.server_ib_port = src_port
-        perf_runner.server_gid_idx = 0  # Always use GID index 0
-        perf_runner.client_ib_dev = dst_ib_name
-        perf_runner.client_ib_port = dst_port
-        perf_runner.client_gid_idx = 0  # Always use GID index 0
-        
+        jobs.append((src_ib_name, src_port, src_gid, dst_ib_name, dst_port, dst_gid))
+    
+    def make_runner(slot, job):
+        src_ib_name, src_port, _, dst_ib_name, dst_port, _ = job
+        # Configure a PerfRunner for this specific connection (GID index is always 0).
         # Use localhost IP for testing, in a real scenario this might be a remote host
-        perf_runner.server_host = '127.0.0.1'
-        
-        # Generate a unique log filename based on the connection
-        log_name = f"test_{src_ib_name}_p{src_port}_to_{dst_ib_name}_p{dst_port}_{perf_runner.get_timestamp()}"
-        perf_runner.log_dir = os.path.join("connection_test_logs")
+        runner = perf_runner.for_connection({'ib_name': src_ib_name, 'port': src_port},
+                                            {'ib_name': dst_ib_name, 'port': dst_port},
+                                            slot, server_host='127.0.0.1')
+        # Log the commands that will be executed (similar to dry run but now we'll actually run them)
+        if verbose:
+            log.info("Server command: %s", ' '.join(runner.build_command_args(is_server=True)))
+            log.info("Client command: %s", ' '.join(runner.build_command_args(is_server=False)))
+        return runner
+    
+    # Connections in one round share no device port and run concurrently
+    rounds = plan_rounds([{(job[0], job[1]), (job[3], job[4])} for job in jobs], max_parallel)
+    for test_round in rounds:
+        round_jobs = [jobs[j] for j in test_round]
+        # Run the actual tests
+        outcomes = run_round([make_runner(slot, job) for slot, job in enumerate(round_jobs)])
         
-        try:
-            # Log the commands that will be executed (similar to dry run but now we'll actually run them)
-            server_cmd = perf_runner.build_command_args(is_server=True)
-            client_cmd = perf_runner.build_command_args(is_server=False)
-            print(f"Server command: {' '.join(server_cmd)}")
-            print(f"Client command: {' '.join(client_cmd)}")
-            
-            # Run the actual test
-            test_success = perf_runner.run()
+        for (src_ib_name, src_port, src_gid, dst_ib_name, dst_port, dst_gid), outcome in zip(round_jobs, outcomes):
+            if isinstance(outcome, Exception):
+                log.error("Exception during performance test: %s", outcome)
+                error_count += 1
+                results.append({
+                    'status': 'error',
+                    'error': str(outcome),
+                    'source': f"{src_ib_name}:port{src_port}",
+                    'destination': f"{dst_ib_name}:port{dst_port}"
+                })
+                continue
             
             # Record results
+            test_success = outcome
             status = 'success' if test_success else 'failed'
             if test_success:
                 success_count += 1
             else:
                 failure_count += 1
                 
-            result = {
+            results.append({
                 'status': status,
                 'source': f"{src_ib_name}:port{src_port} (GID: {src_gid})",
                 'destination': f"{dst_ib_name}:port{dst_port} (GID: {dst_gid})"
-            }
-            results.append(result)
-            
-        except Exception as e:
-            print(f"Exception during performance test: {str(e)}")
-            error_count += 1
-            results.append({
-                'status': 'error',
-                'error': str(e),
-                'source': f"{src_ib_name}:port{src_port}",
-                'destination': f"{dst_ib_name}:port{dst_port}"
             })
     
     print("\n" + "="*50)
@@ -163,70 +198,71 @@ def main():
     parser.add_argument("-v", "--verify", action="store_true", help="Verify connections vs CSV")
     parser.add_argument("-o", "--output", help="Output file for connection data (JSON format)")
     parser.add_argument("-p", "--perf", action="store_true", help="Run performance tests on connections")
+    parser.add_argument("--perf-type", choices=["pp", "bw", "lt"], help="perf_test test type: ping-pong, bandwidth or latency")
+    parser.add_argument("--perf-size", type=int, help="perf_test message size in bytes")
+    parser.add_argument("--perf-iters", type=int, help="perf_test number of iterations")
+    parser.add_argument("--perf-parallel", type=int, default=1, help="Number of connections tested at the same time (connections sharing a port never overlap)")
+    parser.add_argument("--perf-pin-cpus", action="store_true", help="Pin perf_test server and client to separate CPUs with taskset")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Only log warnings and errors (same as --log-level WARNING)")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"], help="Progress logging verbosity")
     args = parser.parse_args()
 
+    logging.basicConfig(format="%(message)s", stream=sys.stdout,
+                        level=logging.WARNING if args.quiet else getattr(logging, args.log_level))
+
     gaudidevices = GaudiDevices()
-    connectivity = GaudiRouting(args.connectivity)
+    connectivity = get_routing(args.connectivity)
 
     # Show device summary if requested or if no specific action is requested
-    if args.devices or not (args.routes or args.json):
+    mapping_shown = args.devices or not (args.routes or args.json)
+    if mapping_shown:
         print_gaudi_device_mapping(gaudidevices)
 
     # Show routing information if requested
     if args.routes or args.json:
         con = connection(gaudidevices, connectivity)
-        # con is now a list of (src, src_port, dst, dst_port)
+        # con is a list of ConnectionPair(src, src_port, dst, dst_port)
         if args.json:
             # Output connection pairs as JSON (module_id, device_id, ib_name, port for src/dst)
-            json_pairs = [
-                {
-                    "src": {
-                        "module_id": src.module_id if src else None,
-                        "device_id": src.device_id if src else None,
-                        "ib_name": src.ib_name if src else None,
-                        "port": src_port
-                    },
-                    "dst": {
-                        "module_id": dst.module_id if dst else None,
-                        "device_id": dst.device_id if dst else None,
-                        "ib_name": dst.ib_name if dst else None,
-                        "port": dst_port
-                    }
-                }
-                for src, src_port, dst, dst_port in con
-            ]
+            json_pairs = [pair.as_dict() for pair in con]
             if args.output:
-                with open(args.output, 'w') as f:
-                    json.dump(json_pairs, f, indent=2)
+                save_json(json_pairs, args.output)
                 print(f"Connection pairs saved to {args.output}")
             else:
-                print(json.dumps(json_pairs, indent=2))
+                print(dumps_json(json_pairs))
         else:
             # Print connection pairs in a readable way
-            print("Connection pairs established:")
-            for src, src_port, dst, dst_port in con:
-                if src and dst:
-                    print(f"  {src} (port {src_port}) <-> {dst} (port {dst_port})")
-                else:
-                    print("  Incomplete connection due to missing device information.")
-            print(f"All connections {len(con)} processed.")
+            print_connection_pairs(con)
             
     # Run performance tests if --perf is specified
     if args.perf:
         if not args.routes:
             print("Warning: --perf requires --routes to be specified for performance testing.")
         else:
-            results = RealRunConnection(con)
+            runner_options = {
+                option: value
+                for option, value in (("test_type", args.perf_type), ("size", args.perf_size), ("iterations", args.perf_iters))
+                if value is not None
+            }
+            if args.perf_pin_cpus:
+                runner_options["pin_cpus"] = True
+            if args.quiet:
+                # Leave perf_test output in the log files instead of echoing it
+                runner_options["quiet"] = True
+            results = RealRunConnection(con, max_parallel=max(1, args.perf_parallel), **runner_options)
             if args.output:
-                with open(args.output, 'w') as f:
-                    json.dump(results, f, indent=2)
+                save_json(results, args.output)
                 print(f"Performance test results saved to {args.output}")
             else:
-                print(json.dumps(results, indent=2))
+                print(dumps_json(results))
 
     # Verification if requested
     if args.verify:
-        modid_to_info = print_gaudi_device_mapping(gaudidevices)
+        # Show the mapping being verified, unless the device summary above already did
+        if mapping_shown:
+            modid_to_info = gaudidevices.get_device_mapping()
+        else:
+            modid_to_info = print_gaudi_device_mapping(gaudidevices)
         verify_connections_vs_csv(modid_to_info, args.connectivity)
 
 
@@ -31,6 +31,13 @@ print_usage() {
     echo "  -v, --verify             Verify connections have active ports"
     echo "  -p, --perf               Run performance tests on connections"
     echo "  --perf-output PATH       Output file for performance test results (JSON format)"
+    echo "  --perf-type TYPE         perf_test test type: pp, bw or lt"
+    echo "  --perf-size BYTES        perf_test message size"
+    echo "  --perf-iters N           perf_test number of iterations"
+    echo "  --perf-parallel N        Test up to N connections at the same time (default 1)"
+    echo "  --perf-pin-cpus          Pin perf_test server and client to separate CPUs with taskset"
+    echo "  -q, --quiet              Only log warnings and errors"
+    echo "  --log-level LEVEL        Progress logging verbosity (DEBUG, INFO, WARNING, ERROR)"
     echo ""
     echo "Examples:"
     echo "  $0                       Show device summary"
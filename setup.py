@@ -13,6 +13,9 @@ setup(
             "pytest>=7.3.1",
             "pytest-cov>=4.1.0",
         ],
+        "fast": [
+            "orjson",
+        ],
     },
     python_requires=">=3.6",
 )
\ No newline at end of file
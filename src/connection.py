@@ -1,46 +1,89 @@
+import logging
+import sys
 from devices.GaudiDevices import GaudiDevices, GaudiDevice
-from connectivity.GaudiRouting import GaudiRouting
-from typing import Dict, List, Tuple, Any, Optional
+from connectivity.GaudiRouting import GaudiRouting, get_routing
+from typing import Dict, List, Tuple, Any, Optional, NamedTuple
 
+log = logging.getLogger('gaudi_conn')
 
-def connection(gaudidevices: GaudiDevices, connectivity: GaudiRouting):
+
+def _endpoint_dict(device: Optional[GaudiDevice], port: int) -> Dict[str, Any]:
+    return {
+        "module_id": device.module_id if device else None,
+        "device_id": device.device_id if device else None,
+        "ib_name": device.ib_name if device else None,
+        "port": port,
+    }
+
+
+class ConnectionPair(NamedTuple):
+    """
+    A connection resolved to devices. Unpacks like a (src, src_port, dst, dst_port) tuple;
+    src/dst are None when no discovered device has the module ID.
+    """
+    src: Optional[GaudiDevice]
+    src_port: int
+    dst: Optional[GaudiDevice]
+    dst_port: int
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the connection as a JSON-serializable dictionary.
+
+        Returns:
+            Dict with 'src' and 'dst' entries holding module_id, device_id, ib_name and port
+        """
+        return {"src": _endpoint_dict(self.src, self.src_port), "dst": _endpoint_dict(self.dst, self.dst_port)}
+
+
+def connection(gaudidevices: GaudiDevices, connectivity: GaudiRouting) -> List[ConnectionPair]:
     """
     Establish a connection between Gaudi devices based on the provided connectivity information.
     """
-    # Get the connectivity information
-    connections = connectivity.get_connections()
-    
+    # Walk the routing columns directly; the nested-dict view is never needed here
+    src_mods, src_ports, dst_mods, dst_ports = (column.tolist() for column in (
+        connectivity.src_mod, connectivity.src_port, connectivity.dst_mod, connectivity.dst_port))
+    get_device = gaudidevices.get_device_by_module_id
+
     connectionpairlist = []
+    append_pair = connectionpairlist.append
+    verbose = log.isEnabledFor(logging.INFO)
     # Iterate through each connection and establish it
-    for connection in connections:
-        source = connection['source']
-        destination = connection['destination']
-        src_device = gaudidevices.get_device_by_module_id(source['module_id'])
-        dst_device = gaudidevices.get_device_by_module_id(destination['module_id'])
-        src_port = source['port']
-        dst_port = destination['port']
+    for src_mod, src_port, dst_mod, dst_port in zip(src_mods, src_ports, dst_mods, dst_ports):
+        src_device = get_device(src_mod)
+        dst_device = get_device(dst_mod)
         if src_device and dst_device:
-            print(f"Connecting {src_device.bus_id} to {dst_device.bus_id} on ports {src_port} -> {dst_port}")
+            if verbose:
+                log.info("Connecting %s to %s on ports %s -> %s", src_device.bus_id, dst_device.bus_id, src_port, dst_port)
         else:
-            print(f"Error: Device not found for connection {connection}")
-        connectionpairlist.append((src_device, src_port, dst_device, dst_port))
+            log.warning("Device not found for connection %s:%s -> %s:%s", src_mod, src_port, dst_mod, dst_port)
+        append_pair(ConnectionPair(src_device, src_port, dst_device, dst_port))
     return connectionpairlist
 
 def print_connection_pairs(con):
-    print("Connection pairs established:")
+    # Build the whole listing and write it once instead of one print per pair
+    lines = ["Connection pairs established:"]
     for src, src_port, dst, dst_port in con:
         if src and dst:
-            print(f"  {src} (port {src_port}) <-> {dst} (port {dst_port})")
+            lines.append(f"  {src} (port {src_port}) <-> {dst} (port {dst_port})")
         else:
-            print("  Incomplete connection due to missing device information.")
-    print(f"All connections {len(con)} processed.")
+            lines.append("  Incomplete connection due to missing device information.")
+    lines.append(f"All connections {len(con)} processed.")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def print_gaudi_device_mapping(gaudidevices):
-    print("\nGaudi device mapping (module_id -> device_id, ib_name):")
+    lines = ["\nGaudi device mapping (module_id -> device_id, ib_name):"]
     modid_to_info = {}
-    for device in gaudidevices.get_devices().values():
-        print(f"module_id={device.module_id}, device_id={device.device_id}, ib_name={device.ib_name}")
+    # List by module_id (devices without one last); build the sort keys once
+    # instead of branching in a key function
+    ordered = sorted(
+        (device.module_id if device.module_id is not None else sys.maxsize, bus_id, device)
+        for bus_id, device in gaudidevices.get_devices().items()
+    )
+    for _, _, device in ordered:
+        lines.append(f"module_id={device.module_id}, device_id={device.device_id}, ib_name={device.ib_name}")
         modid_to_info[device.module_id] = (device.device_id, device.ib_name)
+    sys.stdout.write("\n".join(lines) + "\n")
     return modid_to_info
 
 def verify_connections_vs_csv(modid_to_info, csv_path):
@@ -68,7 +111,7 @@ def verify_connections_vs_csv(modid_to_info, csv_path):
 if __name__ == "__main__":
     # Simple test program for connection logic
     gaudidevices = GaudiDevices()
-    connectivity = GaudiRouting()
+    connectivity = get_routing()
     print("Testing connection logic with available Gaudi devices and connectivity info...")
     con = connection(gaudidevices, connectivity)
     print_connection_pairs(con)
@@ -5,40 +5,261 @@ Gaudi2 Connectivity Parser
 This script extracts connectivity information from the Gaudi2 connectivity CSV file.
 """
 
+import hashlib
+import io
 import os
+import warnings
+from collections import defaultdict
+from functools import lru_cache
 from typing import List, Dict, Tuple, Any, Optional
-import csv 
+
+import numpy as np
+
+# Bump when the layout of the connectivity cache files changes
+_CACHE_VERSION = 3
+
+
+def _source_name(source: Any) -> str:
+    """Describe a connectivity source (path or in-memory stream) for log messages."""
+    return source if isinstance(source, str) else getattr(source, 'name', '<stream>')
+
+
+def _parse_csv(csv_path: Any) -> np.ndarray:
+    """
+    Parse a connectivity CSV file into an (N, 4) int32 connection table.
+
+    Each row holds source module ID, source port, destination module ID and
+    destination port.
+
+    Well-formed files are converted straight into an int32 matrix by
+    numpy.loadtxt; anything it rejects (short rows, non-integer fields,
+    empty files) goes through the line-by-line reader, which reports the
+    offending lines.
+
+    Args:
+        csv_path: Path to the connectivity CSV file, or a seekable binary stream
+
+    Returns:
+        np.ndarray: Connection table of shape (N, 4)
+    """
+    try:
+        with warnings.catch_warnings():
+            # Empty files are reported by _parse_csv_rows instead
+            warnings.simplefilter('ignore', UserWarning)
+            table = np.loadtxt(csv_path, dtype=np.int32, comments='#', delimiter='\t',
+                               usecols=(0, 1, 2, 3), ndmin=2)
+    except (ValueError, OSError):
+        table = None
+    if table is not None and len(table):
+        print(f"Successfully parsed {len(table)} connections from '{_source_name(csv_path)}'")
+        return table
+
+    if hasattr(csv_path, 'seek'):
+        # numpy.loadtxt consumed the stream; rewind it for the line reader
+        csv_path.seek(0)
+    return _parse_csv_rows(csv_path)
+
+
+def _parse_stream(stream: Any) -> np.ndarray:
+    """
+    Parse connectivity data from an open text or binary file-like object.
+
+    Args:
+        stream: File-like object holding the connectivity CSV contents
+
+    Returns:
+        np.ndarray: Connection table of shape (N, 4)
+    """
+    data = stream.read()
+    if isinstance(data, str):
+        data = data.encode()
+    buffer = io.BytesIO(data)
+    buffer.name = _source_name(stream)
+    return _parse_csv(buffer)
+
+
+def _parse_csv_rows(csv_path: Any) -> np.ndarray:
+    """
+    Parse a connectivity CSV file line by line, warning about malformed lines.
+
+    Args:
+        csv_path: Path to the connectivity CSV file, or a binary stream
+
+    Returns:
+        np.ndarray: Connection table of shape (N, 4)
+    """
+    connections = []
+    valid_connections = 0
+    total_lines = 0
+
+    try:
+        # The file is a plain TSV of integers, so split the raw bytes instead of
+        # going through the csv module's dialect machinery
+        if hasattr(csv_path, 'read'):
+            lines = csv_path.read().splitlines()
+        else:
+            with open(csv_path, 'rb', buffering=1 << 20) as f:
+                lines = f.read().splitlines()
+
+        for row_idx, line in enumerate(lines, 1):
+            total_lines += 1
+
+            # Skip empty rows and comments
+            if not line or line.startswith(b'#'):
+                continue
+
+            row = line.split(b'\t')
+            # Well-formed lines split into exactly four fields; only filter out
+            # empty fields (repeated tabs) when the line is irregular
+            if len(row) != 4 or b'' in row:
+                row = [item.strip() for item in row if item.strip()]
+
+            if len(row) >= 4:
+                try:
+                    connections.append((int(row[0]), int(row[1]), int(row[2]), int(row[3])))
+                    valid_connections += 1
+                except (ValueError, IndexError) as e:
+                    print(f"Warning: Invalid connection format at line {row_idx}: {line.decode(errors='replace')} - {str(e)}")
+                    continue
+            else:
+                print(f"Warning: Skipping line {row_idx} with insufficient data: {line.decode(errors='replace')}")
+    except Exception as e:
+        print(f"Error reading connectivity file '{_source_name(csv_path)}': {e}")
+
+    if valid_connections > 0:
+        print(f"Successfully parsed {valid_connections} connections from {total_lines} lines in '{_source_name(csv_path)}'")
+    else:
+        print(f"No valid connections found in '{_source_name(csv_path)}'")
+
+    return np.array(connections, dtype=np.int32).reshape(-1, 4)
+
+
+def _cache_path(cache_dir: str, csv_path: str) -> str:
+    """
+    Return the cache file for a connectivity file inside the cache directory.
+
+    Args:
+        cache_dir: Directory holding the cache files (GAUDI_CACHE_DIR)
+        csv_path: Absolute path of the connectivity CSV file
+
+    Returns:
+        str: Path of the .npz cache file for that CSV
+    """
+    digest = hashlib.sha1(csv_path.encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, f"connectivity_{digest}.npz")
+
+
+@lru_cache(maxsize=None)
+def _load_connections(csv_path: str, mtime_ns: int, size: int) -> np.ndarray:
+    """
+    Load the connection table for a connectivity file, using an on-disk cache when enabled.
+
+    When the GAUDI_CACHE_DIR environment variable is set, the table is stored
+    there as an .npz file with the mtime and size of the CSV it was built from,
+    and only reused while both still match. The cache holds plain int arrays
+    and is loaded with allow_pickle=False. Results are also memoized per
+    (path, mtime, size) so repeated GaudiRouting constructions in one process
+    do not touch the disk again.
+
+    Args:
+        csv_path: Path to the connectivity CSV file
+        mtime_ns: Modification time of the CSV file in nanoseconds
+        size: Size of the CSV file in bytes
+
+    Returns:
+        np.ndarray: Connection table of shape (N, 4)
+    """
+    cache_dir = os.environ.get("GAUDI_CACHE_DIR")
+    if not cache_dir:
+        return _parse_csv(csv_path)
+
+    cache_path = _cache_path(cache_dir, csv_path)
+    try:
+        with np.load(cache_path, allow_pickle=False) as cached:
+            if cached["meta"].tolist() == [_CACHE_VERSION, mtime_ns, size]:
+                return cached["table"].astype(np.int32, copy=False).reshape(-1, 4)
+    except Exception:
+        # Missing, stale-format or corrupt cache: fall back to parsing the CSV
+        pass
+
+    table = _parse_csv(csv_path)
+    # Write under a temporary name so concurrent readers never see a partial file
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, table=table, meta=np.array([_CACHE_VERSION, mtime_ns, size], dtype=np.int64))
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # The cache directory may be read-only or full
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+    return table
+
+
+def _match_mask(src_mod: np.ndarray, dst_mod: np.ndarray, known_modules: np.ndarray) -> np.ndarray:
+    """
+    Flag the connections whose two ends are distinct known modules.
+
+    Membership is a binary search of each column against the sorted module
+    IDs, so the whole table is matched in a few vectorized passes.
+
+    Args:
+        src_mod: Source module ID column
+        dst_mod: Destination module ID column
+        known_modules: Sorted array of discovered module IDs
+
+    Returns:
+        np.ndarray: Boolean mask over the connections
+    """
+    if not len(known_modules):
+        return np.zeros(len(src_mod), dtype=bool)
+    last = len(known_modules) - 1
+    src_known = known_modules[np.minimum(np.searchsorted(known_modules, src_mod), last)] == src_mod
+    dst_known = known_modules[np.minimum(np.searchsorted(known_modules, dst_mod), last)] == dst_mod
+    return src_known & dst_known & (src_mod != dst_mod)
+
 
 class GaudiRouting:
     """
     Class for handling Gaudi2 routing and connectivity information.
     Provides utilities to parse connectivity files and analyze connection patterns.
+
+    Connections are stored as four int32 columns (src_mod, src_port, dst_mod,
+    dst_port); the list-of-dicts view in `connections` is built on first use.
+    The connectivity file itself is only parsed once connections are first
+    needed.
     """
-    
-    def __init__(self, connectivity_file: Optional[str] = None):
+
+    def __init__(self, connectivity_file: Optional[Any] = None):
         """
-        Initialize the GaudiRouting class and parse the connectivity file.
-        
+        Initialize the GaudiRouting class. The connectivity file is parsed on first use.
+
         Args:
-            connectivity_file: Path to the connectivity CSV file. If None, will use the default path.
+            connectivity_file: Path to the connectivity CSV file, or a file-like object holding
+                               its contents (e.g. io.StringIO). If None, will use the default path.
         """
         self.default_path = "/opt/habanalabs/perf-test/scale_up_tool/internal_data/connectivity_HLS2.csv"
         # Fallback to local file if the system file is not available
         if not os.path.exists(self.default_path):
             self.default_path = "./connectivity_HLS2.csv"
         self.connectivity_file = connectivity_file or self.default_path
-        self.connections = []
-        
-        # Parse the connectivity file during initialization
-        self.parse_connectivity_file()
-    
-    def parse_connectivity_file(self, csv_path: Optional[str] = None) -> List[Dict[str, int]]:
+        # (src_mod, src_port, dst_mod, dst_port) columns; None until parsed
+        self._columns = None
+        self._connections = None
+        self._by_src_mod = self._by_dst_mod = None
+
+    def parse_connectivity_file(self, csv_path: Optional[Any] = None) -> List[Dict[str, int]]:
         """
         Parse the Gaudi2 connectivity CSV file and return a list of connections.
-        
+
+        File-like sources are parsed straight from memory and bypass the on-disk cache.
+
         Args:
-            csv_path: Path to the connectivity CSV file. If None, uses the path provided during initialization.
-            
+            csv_path: Path or file-like object for the connectivity CSV. If None, uses the one provided during initialization.
+
         Returns:
             List of dictionaries, each containing:
                 - source_module_id: ID of the source module
@@ -46,78 +267,190 @@ class GaudiRouting:
                 - destination_module_id: ID of the destination module
                 - destination_port: Port number on the destination module
         """
-        
-        if self.connections:
+
+        if self._columns is not None:
             print("Connectivity already parsed. Returning cached connections.")
             return self.connections
-        
+
         csv_path = csv_path or self.connectivity_file
-        
+
+        if not isinstance(csv_path, (str, os.PathLike)):
+            self._set_table(_parse_stream(csv_path))
+            return self.connections
+
+        csv_path = os.fspath(csv_path)
         if not os.path.exists(csv_path):
             print(f"Warning: Connectivity file '{csv_path}' does not exist.")
+            self._set_table(np.empty((0, 4), dtype=np.int32))
             return []
-       
-        connections = [] 
-        valid_connections = 0
-        total_lines = 0
-        
-        try:
-            with open(csv_path, 'r') as f:
-                csv_reader = csv.reader(f, delimiter='\t', skipinitialspace=True)
-                
-                # Process each row in the CSV file
-                for row_idx, row in enumerate(csv_reader, 1):
-                    total_lines += 1
-                    
-                    # Skip empty rows and comments
-                    if not row or (len(row) > 0 and row[0].startswith('#')):
-                        continue
-                    
-                    # Filter out empty strings that might appear due to extra spaces
-                    row = [item for item in row if item]
-                    
-                    if len(row) >= 4:
-                        try:
-                            connection = {
-                                "source": {
-                                   "module_id": int(row[0]),
-                                   "port": int(row[1])
-                                },
-                                "destination": {
-                                   "module_id": int(row[2]),
-                                   "port": int(row[3])
-                                },
-                            }
-                            connections.append(connection)
-                            valid_connections += 1
-                        except (ValueError, IndexError) as e:
-                            print(f"Warning: Invalid connection format at line {row_idx}: {row} - {str(e)}")
-                            continue
-                    else:
-                        print(f"Warning: Skipping line {row_idx} with insufficient data: {row}")
-        except Exception as e:
-            print(f"Error reading connectivity file '{csv_path}': {e}")
-        
-        if valid_connections > 0:
-            print(f"Successfully parsed {valid_connections} connections from {total_lines} lines in '{csv_path}'")
-        else:
-            print(f"No valid connections found in '{csv_path}'")
-        
-        self.connections = connections
-        return connections
-    
+
+        st = os.stat(csv_path)
+        self._set_table(_load_connections(os.path.abspath(csv_path), st.st_mtime_ns, st.st_size))
+        return self.connections
+
+    def _set_table(self, table: np.ndarray) -> None:
+        """
+        Store an (N, 4) connection table as contiguous per-field columns.
+
+        Args:
+            table: Connection table as returned by _parse_csv
+        """
+        self._columns = tuple(np.ascontiguousarray(table.T, dtype=np.int32))
+        self._connections = None
+        # Inverted indexes (value -> row indices), rebuilt on first query
+        self._by_src_mod = None
+        self._by_dst_mod = None
+
+    def _get_columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Return the (src_mod, src_port, dst_mod, dst_port) columns, parsing the file if needed."""
+        if self._columns is None:
+            self.parse_connectivity_file()
+        return self._columns
+
+    @property
+    def src_mod(self) -> np.ndarray:
+        """Source module IDs (int32)."""
+        return self._get_columns()[0]
+
+    @property
+    def src_port(self) -> np.ndarray:
+        """Source ports (int32)."""
+        return self._get_columns()[1]
+
+    @property
+    def dst_mod(self) -> np.ndarray:
+        """Destination module IDs (int32)."""
+        return self._get_columns()[2]
+
+    @property
+    def dst_port(self) -> np.ndarray:
+        """Destination ports (int32)."""
+        return self._get_columns()[3]
+
+    def _build_indexes(self) -> None:
+        """Build source and destination module_id -> row index lookups for the current table."""
+        src_mod, _, dst_mod, _ = self._get_columns()
+        indexes = []
+        for column in (src_mod, dst_mod):
+            index = defaultdict(list)
+            for row, value in enumerate(column.tolist()):
+                index[value].append(row)
+            indexes.append(dict(index))
+        self._by_src_mod, self._by_dst_mod = indexes
+
+    def _rows(self, *row_lists: List[int]) -> List[Dict[str, Any]]:
+        """Return the connection dicts for the union of the given row index lists, in file order."""
+        connections = self.connections
+        return [connections[row] for row in sorted(set().union(*row_lists))]
+
+    @property
+    def connections(self) -> List[Dict[str, Any]]:
+        """
+        Connections as a list of {'source': {...}, 'destination': {...}} dictionaries.
+
+        Built from the column arrays on first access and cached afterwards.
+        """
+        if self._connections is None:
+            src_mod, src_port, dst_mod, dst_port = self._get_columns()
+            self._connections = [
+                {
+                    "source": {"module_id": sm, "port": sp},
+                    "destination": {"module_id": dm, "port": dp},
+                }
+                for sm, sp, dm, dp in zip(src_mod.tolist(), src_port.tolist(),
+                                          dst_mod.tolist(), dst_port.tolist())
+            ]
+        return self._connections
+
     def get_connections(self) -> List[Dict[str, int]]:
         """
-        Get the parsed connections.
-        
+        Get the parsed connections, parsing the connectivity file on first use.
+
         Returns:
             List of dictionaries containing connection information.
         """
-        if not self.connections:
-            print("No connections parsed yet. Parsing connectivity file...")
-            self.parse_connectivity_file()
         return self.connections
 
+    def get_module_connections(self, module_id: Optional[int] = None) -> Dict[int, Dict[str, List[Dict[str, Any]]]]:
+        """
+        Group connections by module.
+
+        Args:
+            module_id: Only report this module. If None, report every module in the table.
+
+        Returns:
+            Dict mapping module ID to {'outgoing': [...], 'incoming': [...]} connection lists
+        """
+        if self._by_src_mod is None:
+            self._build_indexes()
+        if module_id is None:
+            module_ids = sorted(set(self._by_src_mod) | set(self._by_dst_mod))
+        else:
+            module_ids = [module_id]
+        return {
+            mod: {
+                'outgoing': self._rows(self._by_src_mod.get(mod, [])),
+                'incoming': self._rows(self._by_dst_mod.get(mod, [])),
+            }
+            for mod in module_ids
+        }
+
+    def match_devices_to_connections(self, devices: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Match discovered devices to the parsed connections.
+
+        Args:
+            devices: Dictionary mapping PCI bus IDs to device information dictionaries
+                     containing at least a 'module_id'
+
+        Returns:
+            List of dictionaries for every connection whose source and destination modules
+            are both present (and differ), each containing:
+                - source: {'module_id', 'port'} of the source end
+                - destination: {'module_id', 'port'} of the destination end
+                - source_device_id: PCI bus ID of the source device
+                - dest_device_id: PCI bus ID of the destination device
+        """
+        module_to_bus_id = {
+            device['module_id']: bus_id
+            for bus_id, device in devices.items()
+            if device.get('module_id') is not None
+        }
+        module_ids = np.sort(np.fromiter(module_to_bus_id, dtype=np.int32, count=len(module_to_bus_id)))
+
+        # Select matching rows over the whole table at once instead of per connection
+        src_mod, src_port, dst_mod, dst_port = self._get_columns()
+        idx = np.flatnonzero(_match_mask(src_mod, dst_mod, module_ids))
+
+        return [
+            {
+                "source": {"module_id": sm, "port": sp},
+                "destination": {"module_id": dm, "port": dp},
+                "source_device_id": module_to_bus_id[sm],
+                "dest_device_id": module_to_bus_id[dm],
+            }
+            for sm, sp, dm, dp in zip(src_mod[idx].tolist(), src_port[idx].tolist(),
+                                      dst_mod[idx].tolist(), dst_port[idx].tolist())
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_routing(connectivity_file: Optional[str] = None) -> GaudiRouting:
+    """
+    Get a shared, already parsed GaudiRouting instance for a connectivity file.
+
+    Repeated calls with the same path return the same instance, so callers must
+    treat it as read-only.
+
+    Args:
+        connectivity_file: Path to the connectivity CSV file. If None, uses the default path.
+
+    Returns:
+        GaudiRouting: The shared instance for that path
+    """
+    return GaudiRouting(connectivity_file)
+
+
 if __name__ == "__main__":
     # Test program for GaudiRouting
     print("Testing GaudiRouting connectivity parser...")
@@ -127,4 +460,3 @@ if __name__ == "__main__":
     # Print first 3 connections as a sample
     for idx, conn in enumerate(connections[:3]):
         print(f"Connection {idx+1}: {conn}")
-
@@ -10,10 +10,77 @@ import subprocess
 import csv
 import os
 import json
-from typing import  Dict, Any, Optional
+import shutil
+from typing import  Dict, Any, Optional, List, Tuple
 from abc import ABC, abstractmethod
 
 
+HL_SMI_QUERY = ["hl-smi", "-Q", "index,module_id,bus_id", "-f", "csv"]
+HL_SMI_CACHE_FILE = "hlsmi_devices.json"
+
+
+def _hlsmi_cache_key() -> Optional[List[Any]]:
+    """
+    Build the staleness key for cached hl-smi output.
+
+    The output only changes with the installed hl-smi/driver or after a reboot,
+    so the key is the hl-smi path and mtime plus the kernel boot ID.
+
+    Returns:
+        List of key fields, or None if hl-smi is not on PATH
+    """
+    hlsmi_path = shutil.which(HL_SMI_QUERY[0])
+    if hlsmi_path is None:
+        return None
+    key = [hlsmi_path, os.stat(hlsmi_path).st_mtime_ns]
+    try:
+        with open("/proc/sys/kernel/random/boot_id") as f:
+            key.append(f.read().strip())
+    except OSError:
+        pass
+    return key
+
+
+def _run_hlsmi() -> str:
+    """
+    Run the hl-smi device query and return its CSV output.
+
+    When the GAUDI_CACHE_DIR environment variable is set, the output is cached
+    in that directory and reused while the cache key still matches, so warm
+    runs skip the hl-smi fork/exec.
+
+    Returns:
+        str: hl-smi CSV output
+
+    Raises:
+        FileNotFoundError: If hl-smi command is not found
+        subprocess.CalledProcessError: If hl-smi fails
+    """
+    cache_dir = os.environ.get("GAUDI_CACHE_DIR")
+    cache_path = None
+    key = None
+    if cache_dir:
+        key = _hlsmi_cache_key()
+        cache_path = os.path.join(cache_dir, HL_SMI_CACHE_FILE)
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
+            if key is not None and cached["key"] == key:
+                return cached["stdout"]
+        except (OSError, ValueError, KeyError, TypeError):
+            # Missing or unreadable cache: run hl-smi
+            pass
+
+    result = subprocess.run(HL_SMI_QUERY, check=True, capture_output=True, text=True)
+
+    if cache_path and key is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, "w") as f:
+                json.dump({"key": key, "stdout": result.stdout}, f)
+        except OSError:
+            pass
+    return result.stdout
 
 
 class PCIeDevice(ABC):
@@ -21,6 +88,7 @@ class PCIeDevice(ABC):
     Abstract base class for PCIe devices.
     Provides a common interface for device properties and methods.
     """
+    __slots__ = ()
     
     @abstractmethod
     def get_device_info(self) -> Dict[str, Any]:
@@ -44,6 +112,7 @@ class MlxDevice(PCIeDevice):
     """
     Class representing an individual Mellanox device with its properties.
     """
+    __slots__ = ('bus_id', 'device_info')
     
     def __init__(self, bus_id: str, device_info: Dict[str, Any] = None):
         """
@@ -83,6 +152,7 @@ class GaudiDevice(PCIeDevice):
     """
     Class representing an individual Gaudi device with its properties and associated InfiniBand information.
     """
+    __slots__ = ('bus_id', 'module_id', 'device_id', 'ib_name', 'node_guid', 'node_type', 'vendor_id', 'ports', 'active_ports')
     
     def __init__(self, bus_id: str, device_info: Dict[str, Any] = None, infiniband_info: Dict[str, Any] = None):
         """
@@ -101,7 +171,9 @@ class GaudiDevice(PCIeDevice):
         self.ib_name = None       # InfiniBand device name (e.g., mlx5_0)
         self.node_guid = None     # InfiniBand node GUID
         self.node_type = None     # InfiniBand node type
-        self.ports = ()           # Tuple of ports indexed by port number
+        self.vendor_id = None     # PCI vendor ID found by the InfiniBand scan
+        self.ports = {}           # Port number -> Port
+        self.active_ports = frozenset()  # Port numbers whose state is active
 
     def get_device_info(self) -> Dict[str, Any]:
         """
@@ -117,6 +189,7 @@ class GaudiDevice(PCIeDevice):
             'ib_name': self.ib_name,
             'node_guid': self.node_guid,
             'node_type': self.node_type,
+            'vendor_id': self.vendor_id,
             'ports': self.ports
         }
         
@@ -141,8 +214,11 @@ class GaudiDevice(PCIeDevice):
             self.node_guid = device_info['node_guid']
         if 'node_type' in device_info:
             self.node_type = device_info['node_type']
+        if 'vendor_id' in device_info:
+            self.vendor_id = device_info['vendor_id']
         if 'ports' in device_info:
-            self.ports = {port['port_num']: port for port in device_info['ports']}
+            self.ports = {port.port_num: port for port in device_info['ports']}
+            self.active_ports = frozenset(port_num for port_num, port in self.ports.items() if port.is_active)
             
     def __str__(self):
         """
@@ -162,6 +238,8 @@ class GaudiDevices:
     def __init__(self):
         """Initialize the GaudiDevices class."""
         self._devices = {}  # Cache for device information
+        self._devices_by_module_id: Dict[int, GaudiDevice] = {}  # module_id -> device index
+        self._device_mapping = None  # module_id -> (device_id, ib_name), built on first use
         self._parse_gaudi_devices()  # Initialize device objects
         from . import InfinibandDevices
         self._infiniband_devices = InfinibandDevices.InfinibandDevices()  # Initialize InfiniBand devices handler
@@ -182,26 +260,27 @@ class GaudiDevices:
             return self._devices
         
         try:
-            # Run the hl-smi command to get device information in CSV format
-            cmd = ["hl-smi", "-Q", "index,module_id,bus_id", "-f", "csv"]
-            result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+            # Run the hl-smi command (or reuse its cached output) to get device information in CSV format
+            stdout = _run_hlsmi()
             
-            # Parse the CSV output
-            reader = csv.DictReader(result.stdout.strip().split('\n'))
+            # Parse the CSV output; look the columns up once in the header
+            # and unpack each row by index
+            reader = csv.reader(stdout.strip().splitlines())
+            header = next(reader, None)
+            if header is None:
+                # No output at all: no devices
+                return self._devices
+            header = [name.strip() for name in header]
+            i_idx = header.index('index')
+            i_mod = header.index('module_id')
+            i_bus = header.index('bus_id')
             
             for row in reader:
-                # Clean up the keys and values by stripping whitespace
-                device = {k.strip(): v.strip() for k, v in row.items()}
-                
-                # Convert numeric fields to integers
-                if 'index' in device:
-                    device['index'] = int(device['index'])
-                if 'module_id' in device:
-                    device['module_id'] = int(device['module_id'])
-                if 'bus_id' in device:
-                    busid = device['bus_id'].strip()
-                    device['bus_id'] = busid
-                self._devices[device['bus_id']] = GaudiDevice(busid, device)
+                busid = row[i_bus].strip()
+                gdev = GaudiDevice(busid, {'index': int(row[i_idx]), 'module_id': int(row[i_mod]), 'bus_id': busid})
+                self._devices[busid] = gdev
+                # The first device listed for a module ID wins, as with a linear scan
+                self._devices_by_module_id.setdefault(gdev.module_id, gdev)
                 
             return self._devices
 
@@ -234,12 +313,29 @@ class GaudiDevices:
         Returns:
             GaudiDevice: The GaudiDevice object if found, else None
         """
-        for device in self._devices.values():
-            if device.module_id == module_id:
-                return device
-        return None 
+        return self._devices_by_module_id.get(module_id)
         
     
+    def get_device_mapping(self, use_cache: bool = True) -> Dict[int, Tuple[Optional[int], Optional[str]]]:
+        """
+        Get the module ID to (device ID, InfiniBand name) mapping of the discovered devices.
+        
+        Built from the already discovered devices on first call and reused afterwards.
+        
+        Args:
+            use_cache: Rebuild the mapping from the current devices if False
+        
+        Returns:
+            Dict[int, Tuple[Optional[int], Optional[str]]]: A dictionary mapping module IDs to (device_id, ib_name)
+        """
+        if use_cache and self._device_mapping is not None:
+            return self._device_mapping
+        self._device_mapping = {
+            module_id: (device.device_id, device.ib_name)
+            for module_id, device in self._devices_by_module_id.items()
+        }
+        return self._device_mapping
+
     def get_devices(self) -> Dict[str, GaudiDevice]:
         """
         Get all Gaudi devices.
@@ -264,7 +360,7 @@ if __name__ == "__main__":
     devices = gaudi_devices.get_gaudi_devices()
 
     for bus_id, device in devices.items():
-        print(f"Bus ID: {bus_id}, Device Info: {device.__dict__}")
+        print(f"Bus ID: {bus_id}, Device Info: {device.get_device_info()}")
 
     # You can also access specific properties like:
     # print(devices['0000:4d:00.0'].module_id)
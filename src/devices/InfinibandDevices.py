@@ -5,10 +5,45 @@ This script scans the /sys filesystem to find InfiniBand devices and their activ
 """
 
 import os
+import re
+import sys
 import glob
 import json
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Tuple, Any, Optional
 
+# One InfiniBand port as read from sysfs
+Port = namedtuple('Port', 'port_num state is_active link_layer')
+
+# Upper bound on threads used to scan InfiniBand devices
+_SCAN_WORKERS = 8
+
+# Last PCI address component (domain 0000) of a resolved sysfs device path
+_PCI_RE = re.compile(r'.*/(0000:[0-9a-f]{2}:[0-9a-f]{2}\.[0-9a-f])(?=/|$)', re.I)
+
+
+def _readtiny(path: str) -> Optional[str]:
+    """
+    Read a small sysfs attribute file and return its stripped contents.
+
+    Uses a raw os.open/os.read pair instead of open() so no buffered text
+    reader is built for files that only hold a few bytes.
+
+    Returns:
+        str: The file contents, or None if the file cannot be read
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return None
+    try:
+        return os.read(fd, 64).decode().strip()
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
 
 class InfinibandDevices:
     """
@@ -21,8 +56,9 @@ class InfinibandDevices:
         # Cache for device information
         self._other_devices = {}  # Other devices
         self._gaudi_devices = {}  # Gaudi devices
+        self._vendor_cache: Dict[str, Optional[str]] = {}  # PCI path -> vendor ID
 
-        self._gaudi_vendor_id = gaudi_vendor_id.lower()  # Ensure vendor ID is lowercase
+        self._gaudi_vendor_id = sys.intern(gaudi_vendor_id.lower())  # Ensure vendor ID is lowercase
         # Base path for InfiniBand devices
         self.ib_path = "/sys/class/infiniband"
 
@@ -33,80 +69,108 @@ class InfinibandDevices:
             return {"gaudi": {}, "other": {}}
     
         
-        for device_path in glob.glob(os.path.join(self.ib_path, "*")):
-            device_name = os.path.basename(device_path)
-            # Extract PCI bus ID from the device path (symlink) - use the LAST one in the path
-            pci_bus_id = "Unknown"
-            pci_path = None
-            try:
-                real_path = os.path.realpath(device_path)
-                pci_parts = [p for p in real_path.split('/') if p.startswith('0000:')]
-                if pci_parts:
-                    pci_bus_id = pci_parts[-1]  # Use the last PCI bus ID
-                    idx = real_path.rfind(pci_bus_id)
-                    if idx != -1:
-                        pci_path = real_path[:idx + len(pci_bus_id)]
-            except Exception:
-                pass
-    
-            # Identify vendor by walking up the directory tree to find a vendor file
-            vendor_id = None
-            if pci_path:
-                vendor_id = self._get_vendor_id(pci_path)
-            is_gaudi = vendor_id == self._gaudi_vendor_id
-
-            # Gather port info
-            ports = self._gather_port_info(device_path)
-    
-            device_info = {
-                "ib_name": device_name,
-                "pci_bus_id": pci_bus_id,
-                "vendor_id": vendor_id,
-                "ports": ports
-            }
-            
+        with os.scandir(self.ib_path) as it:
+            entries = list(it)
+
+        # sysfs reads release the GIL, so scan the devices concurrently and
+        # merge the results here in the calling thread
+        if len(entries) > 1:
+            with ThreadPoolExecutor(max_workers=min(_SCAN_WORKERS, len(entries)),
+                                    thread_name_prefix='ib-scan') as executor:
+                scanned = list(executor.map(self._process_one_device, entries))
+        else:
+            scanned = [self._process_one_device(entry) for entry in entries]
+
+        get_gaudi_device = gaudi_devices.get_device_by_bus_id
+        gaudi_devices_by_bus_id = self._gaudi_devices
+        from .GaudiDevices import MlxDevice
+
+        for pci_bus_id, device_info, is_gaudi in scanned:
             if is_gaudi:
                 # If it's a Gaudi device, check if it exists in the GaudiDevices cache
-                gaudidevice = gaudi_devices.get_device_by_bus_id(pci_bus_id)
+                gaudidevice = get_gaudi_device(pci_bus_id)
                 if gaudidevice:
                     gaudidevice.update_device_info(device_info)
-                self._gaudi_devices[pci_bus_id] = gaudidevice
+                gaudi_devices_by_bus_id[pci_bus_id] = gaudidevice
             else:
-                from .GaudiDevices import MlxDevice
                 self._other_devices[pci_bus_id] = MlxDevice(pci_bus_id, device_info)
 
         print(f"Found {len(self._gaudi_devices)} Gaudi devices and {len(self._other_devices)} other devices")
         return {"gaudi": self._gaudi_devices, "other": self._other_devices}
 
+    def _process_one_device(self, entry: os.DirEntry) -> Tuple[str, Dict[str, Any], bool]:
+        """
+        Read the sysfs information of one InfiniBand device.
+        
+        Args:
+            entry: Directory entry of the device under the InfiniBand class path
+            
+        Returns:
+            Tuple[str, Dict[str, Any], bool]: PCI bus ID, device information and whether it is a Gaudi device
+        """
+        device_path = entry.path
+        # Extract PCI bus ID from the device path (symlink) - use the LAST one in the path
+        pci_bus_id = "Unknown"
+        pci_path = None
+        try:
+            match = _PCI_RE.match(os.path.realpath(device_path))
+            if match:
+                pci_bus_id = match.group(1)  # Use the last PCI bus ID
+                pci_path = match.string[:match.end(1)]
+        except Exception:
+            pass
+
+        # Identify vendor by walking up the directory tree to find a vendor file
+        vendor_id = None
+        if pci_path:
+            vendor_id = self._get_vendor_id(pci_path)
+
+        device_info = {
+            "ib_name": entry.name,
+            "pci_bus_id": pci_bus_id,
+            "vendor_id": vendor_id,
+            "ports": self._gather_port_info(device_path)
+        }
+        return pci_bus_id, device_info, vendor_id == self._gaudi_vendor_id
+
     def _get_vendor_id(self, pci_path: str) -> Optional[str]:
         """
         Extract the vendor ID from a PCI device path.
         
+        Results are cached for every path visited on the walk up, so devices
+        behind the same PCIe bridge only read the shared vendor file once.
+        
         Args:
             pci_path: The path to the PCI device
             
         Returns:
             str: The vendor ID if found, None otherwise
         """
+        cache = self._vendor_cache
+        visited = []
+        vendor_id = None
         current_path = pci_path
         for _ in range(10):  # limit to 10 parent traversals
-            vendor_file = os.path.join(current_path, 'vendor')
-            if os.path.exists(vendor_file):
-                try:
-                    with open(vendor_file, 'r') as f:
-                        vendor_id = f.read().strip().lower()
-                        if vendor_id.startswith('0x'):
-                            vendor_id = vendor_id[2:]
-                    return vendor_id
-                except Exception:
-                    pass
+            if current_path in cache:
+                vendor_id = cache[current_path]
+                break
+            visited.append(current_path)
+            vendor_id = _readtiny(os.path.join(current_path, 'vendor'))
+            if vendor_id is not None:
+                vendor_id = vendor_id.lower()
+                if vendor_id.startswith('0x'):
+                    vendor_id = vendor_id[2:]
+                vendor_id = sys.intern(vendor_id)
+                break
             parent = os.path.dirname(current_path)
             if parent == current_path:
                 break
             current_path = parent
-        return None
+        for path in visited:
+            cache[path] = vendor_id
+        return vendor_id
         
-    def _gather_port_info(self, device_path: str) -> List[Dict[str, Any]]:
+    def _gather_port_info(self, device_path: str) -> List[Port]:
         """
         Gather information about ports for an InfiniBand device.
         
@@ -114,42 +178,41 @@ class InfinibandDevices:
             device_path: The path to the device
             
         Returns:
-            List[Dict[str, Any]]: List of port information dictionaries
+            List[Port]: List of port records
         """
         ports = []
-        port_paths = glob.glob(os.path.join(device_path, "ports", "*"))
-        for port_path in port_paths:
-            port_num = int(os.path.basename(port_path))
-            state = "Unknown"
-            is_active = False
+        try:
+            with os.scandir(os.path.join(device_path, "ports")) as it:
+                port_entries = list(it)
+        except OSError:
+            return ports
+        join = os.path.join
+        # Port states and link layers repeat across every port; share one string each
+        intern = sys.intern
+        for port_entry in port_entries:
+            port_path = port_entry.path
+            port_num = int(port_entry.name)
             
-            # Get port state
-            state_path = os.path.join(port_path, "state")
-            if os.path.exists(state_path):
-                with open(state_path, 'r') as f:
-                    state = f.read().strip()
-                    # More precise state detection - check for proper IB port states
-                    # Per the InfiniBand spec, valid states are: 
-                    # 1: Down, 2: Initializing, 3: Armed, 4: Active, 5: ActiveDefer
-                    if state.startswith("4:") or state.startswith("5:") or "ACTIVE" in state:
-                        is_active = True
-                        
+            # Get port state; open directly instead of stat-ing first
+            state = _readtiny(join(port_path, "state"))
+            if state is None:
+                state = "Unknown"
+                is_active = False
+            else:
+                state = intern(state)
+                # More precise state detection - check for proper IB port states
+                # Per the InfiniBand spec, valid states are:
+                # 1: Down, 2: Initializing, 3: Armed, 4: Active, 5: ActiveDefer
+                is_active = state.startswith(("4:", "5:")) or "ACTIVE" in state
+
             # Get link layer
-            link_layer = "Unknown"
-            link_layer_path = os.path.join(port_path, "link_layer")
-            if os.path.exists(link_layer_path):
-                with open(link_layer_path, 'r') as f:
-                    link_layer = f.read().strip()
+            link_layer = _readtiny(join(port_path, "link_layer"))
+            if link_layer is None:
+                link_layer = "Unknown"
+            else:
+                link_layer = intern(link_layer)
                     
-            port_info = {
-                "port_num": port_num,
-                "state": state,
-                "is_active": is_active,
-                "link_layer": link_layer
-            }
-            
-           
-            ports.append(port_info)
+            ports.append(Port(port_num, state, is_active, link_layer))
             
         return ports
 
@@ -20,7 +20,367 @@ import sys
 import os
 import signal
 import re
+import mmap
+import selectors
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+
+# Output classification for PerfRunner.analyze_results: one pass of a single
+# compiled pattern tags each hit as an error, a performance metric or a
+# completion message
+_OUTPUT_RE = re.compile(
+    r"(?P<error>error|failed|cannot|unable|timeout|refused)"
+    r"|(?P<metric>bandwidth|latency|mbps|gbps|usec)"
+    r"|(?P<done>completed|success)",
+    re.IGNORECASE
+)
+
+# Same classification over raw log bytes, used in quiet mode
+_OUTPUT_BYTES_RE = re.compile(_OUTPUT_RE.pattern.encode(), re.IGNORECASE)
+
+# perf_test server lines that show it is listening (or gave up trying)
+_SERVER_READY_RE = re.compile(r"listening|server started|listen failed", re.IGNORECASE)
+_SERVER_READY_BYTES_RE = re.compile(_SERVER_READY_RE.pattern.encode(), re.IGNORECASE)
+
+# Seconds between checks of the server log for readiness in quiet mode
+_LOG_POLL_INTERVAL = 0.02
+
+# Bytes requested per read of a perf_test output pipe
+_READ_SIZE = 1 << 16
+
+# Lines of recent output kept per process for display; every line is
+# classified as it arrives and the full output goes to the log files
+_OUTPUT_TAIL = 4096
+
+# Write buffer of the streamed log files
+_LOG_BUFFER = 1 << 16
+
+# Seconds analyze_results waits for the output of an exited process to be handled
+_DRAIN_TIMEOUT = 2
+
+
+@lru_cache(maxsize=256)
+def _command_template(perf_test_path, port, test_type, size, iterations, ib_dev, ib_port):
+    """
+    Build the perf_test argv shared by server and client for one IB endpoint.
+    Only the device, port and server host change between connections, so the
+    tuple is cached per setting.
+    Args:
+        perf_test_path: Path to the perf_test binary
+        port: TCP port number
+        test_type: Performance test type
+        size: Message size in bytes
+        iterations: Number of iterations
+        ib_dev: IB device name
+        ib_port: IB port number
+    Returns:
+        Tuple of command arguments
+    """
+    args = [perf_test_path]
+    
+    # Common arguments
+    if port:
+        args += ['-p', str(port)]
+    if test_type:
+        args += ['-t', test_type]
+    if size:
+        args += ['-s', str(size)]
+    if iterations:
+        args += ['-n', str(iterations)]
+    
+    # IB settings of this endpoint
+    if ib_dev:
+        args += ['-d', ib_dev]
+    if ib_port:
+        args += ['-i', str(ib_port)]
+    # Always use gid_idx=0 regardless of input value
+    args += ['-g', '0']
+    return tuple(args)
+
+
+def plan_rounds(endpoint_sets, max_parallel=1):
+    """
+    Group tests into rounds that can run at the same time: tests in one round
+    share no endpoint, and a round holds at most max_parallel tests.
+    Args:
+        endpoint_sets: One set of hashable endpoints, e.g. (ib_name, port), per test
+        max_parallel: Maximum number of tests per round
+    Returns:
+        List of rounds, each a list of indexes into endpoint_sets
+    """
+    rounds = []
+    round_endpoints = []
+    for i, endpoints in enumerate(endpoint_sets):
+        for test_round, used in zip(rounds, round_endpoints):
+            if len(test_round) < max_parallel and used.isdisjoint(endpoints):
+                break
+        else:
+            test_round, used = [], set()
+            rounds.append(test_round)
+            round_endpoints.append(used)
+        test_round.append(i)
+        used |= endpoints
+    return rounds
+
+
+def run_round(runners):
+    """
+    Run the tests of one round at the same time.
+    A single test runs inline in the calling thread, so Ctrl-C reaches the
+    interrupt handling in PerfRunner.run. With several tests, an interrupt
+    cleans up every runner of the round and is re-raised: it is only
+    delivered to the main thread, and perf_test runs in its own session.
+    Args:
+        runners: PerfRunner instances to run, one per connection
+    Returns:
+        List with each runner's run() result, or the exception it raised
+    """
+    if len(runners) == 1:
+        try:
+            return [runners[0].run()]
+        except Exception as e:
+            return [e]
+    
+    executor = ThreadPoolExecutor(max_workers=len(runners), thread_name_prefix='perf')
+    futures = []
+    try:
+        for runner in runners:
+            futures.append(executor.submit(runner.run))
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append(future.result())
+            except Exception as e:
+                outcomes.append(e)
+        return outcomes
+    except KeyboardInterrupt:
+        for future in futures:
+            future.cancel()
+        for runner in runners:
+            runner.cleanup()
+        raise
+    finally:
+        executor.shutdown(wait=True)
+
+
+# perf_test paths already found executable; misses are not remembered, so a
+# binary installed or made executable later in the process is picked up
+_PERF_TEST_FOUND = set()
+
+
+def perf_test_available(perf_test_path):
+    """
+    Check that the perf_test binary exists and is executable.
+    Only positive results are cached: the binary does not go away during a run.
+    Args:
+        perf_test_path: Path of the perf_test binary
+    Returns:
+        True if perf_test can be executed
+    """
+    if perf_test_path in _PERF_TEST_FOUND:
+        return True
+    try:
+        available = bool(os.stat(perf_test_path).st_mode & 0o111)
+    except OSError:
+        return False
+    if available:
+        _PERF_TEST_FOUND.add(perf_test_path)
+    return available
+
+
+def _scan_lines(lines):
+    """
+    Classify output lines with _OUTPUT_RE.
+    Args:
+        lines: Iterable of decoded output lines
+    Returns:
+        Iterator of (line, set of matched group names) for lines with a match
+    """
+    finditer = _OUTPUT_RE.finditer
+    for line in lines:
+        kinds = {match.lastgroup for match in finditer(line)}
+        if kinds:
+            yield line, kinds
+
+
+def _scan_log(path, start=0, whole=True):
+    """
+    Classify the lines of a log file with one scan of the memory-mapped file,
+    without splitting it into Python strings first.
+    Args:
+        path: Log file path
+        start: Byte offset to scan from, at the beginning of a line
+        whole: Also scan a last line without a trailing newline; leave False
+               while the process may still be writing it
+    Returns:
+        Tuple of (list of (line, set of matched group names) for lines with a
+        match, offset where the scan stopped)
+    """
+    scanned = []
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= start:
+            return scanned, start
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            end = len(data) if whole else data.rfind(b'\n', start) + 1
+            line_start, line, kinds = -1, b'', None
+            for match in _OUTPUT_BYTES_RE.finditer(data, start, end):
+                newline = data.rfind(b'\n', start, match.start())
+                first = newline + 1 if newline >= 0 else start
+                if first != line_start:
+                    if kinds:
+                        scanned.append((line.decode('utf-8', errors='replace').strip(), kinds))
+                    last = data.find(b'\n', match.end(), end)
+                    line_start, line, kinds = first, data[first:last if last >= 0 else end], set()
+                kinds.add(match.lastgroup)
+            if kinds:
+                scanned.append((line.decode('utf-8', errors='replace').strip(), kinds))
+    return scanned, max(end, start)
+
+
+class _OutputSink:
+    """
+    Receives the raw output chunks of one process from the reactor: writes them
+    to the log file, splits complete lines into the output list, classifies
+    them for analyze_results and signals readiness and end of output.
+    """
+    __slots__ = ('output_list', 'name', 'ready', 'log_file', 'buffer', 'done', 'lock', 'classified')
+    
+    def __init__(self, output_list, name, ready=None, log_file=None):
+        self.output_list = output_list
+        self.name = name
+        self.ready = ready
+        self.log_file = log_file
+        self.buffer = bytearray()
+        # Set once the process closed its output and everything was handled
+        self.done = threading.Event()
+        # Guards output_list and classified
+        self.lock = threading.Lock()
+        # (line, kinds) for every line matching _OUTPUT_RE, kept even after the
+        # line has dropped out of a bounded output_list
+        self.classified = []
+    
+    def feed(self, chunk):
+        """Handle one chunk read from the pipe; an empty chunk means end of output"""
+        if not chunk:
+            self.finish()
+            return
+        if self.log_file is not None:
+            self.log_file.write(chunk)
+        buffer = self.buffer
+        buffer += chunk
+        end = buffer.rfind(b'\n')
+        if end >= 0:
+            lines = buffer[:end].split(b'\n')
+            del buffer[:end + 1]
+            self.handle_lines(lines)
+    
+    def finish(self):
+        """Flush the last unterminated line, close the log and signal the end of output"""
+        try:
+            if self.buffer:
+                self.handle_lines([self.buffer])
+                self.buffer = bytearray()
+            if self.log_file is not None:
+                self.log_file.close()
+        finally:
+            # The process closed its output, so start_server has nothing left to wait for
+            if self.ready is not None:
+                self.ready.set()
+            self.done.set()
+    
+    def classified_since(self, start):
+        """
+        Args:
+            start: Number of classified lines already seen by the caller
+        Returns:
+            Tuple of (classified lines from index start on, total classified so far)
+        """
+        with self.lock:
+            return self.classified[start:], len(self.classified)
+    
+    def handle_lines(self, lines):
+        """Decode, classify, store and echo complete output lines"""
+        decoded = [line.decode('utf-8', errors='replace').strip() for line in lines]
+        scanned = list(_scan_lines(decoded))
+        with self.lock:
+            self.output_list.extend(decoded)
+            self.classified.extend(scanned)
+        # Echo the whole chunk with one write instead of a print per line
+        prefix = f"[{self.name}] "
+        sys.stdout.write(''.join([f"{prefix}{decoded_line}\n" for decoded_line in decoded]))
+        ready = self.ready
+        if ready is not None and not ready.is_set():
+            if any(_SERVER_READY_RE.search(decoded_line) for decoded_line in decoded):
+                ready.set()
+
+
+class _OutputReactor:
+    """
+    One background thread reading the output pipes of all running perf_test
+    processes through a selector, instead of a capture thread per process.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = []
+        # Selector, wake-up pipe and thread are created on the first register,
+        # so importing the module costs no file descriptors
+        self._selector = None
+        self._wake_read = self._wake_write = None
+        self._thread = None
+    
+    def register(self, fileobj, sink):
+        """
+        Start reading a pipe.
+        Args:
+            fileobj: Readable pipe (file object or file descriptor)
+            sink: Object whose feed(chunk) receives the data, b'' at end of output
+        """
+        with self._lock:
+            self._pending.append((fileobj, sink))
+            if self._thread is None:
+                # Registrations are handed over through _pending and this pipe wakes
+                # the reactor up, so the selector is only touched by its own thread
+                self._selector = selectors.DefaultSelector()
+                self._wake_read, self._wake_write = os.pipe()
+                self._selector.register(self._wake_read, selectors.EVENT_READ)
+                self._thread = threading.Thread(target=self._run, name='perf-output', daemon=True)
+                self._thread.start()
+        os.write(self._wake_write, b'\0')
+    
+    def _run(self):
+        select = self._selector.select
+        while True:
+            for key, _ in select():
+                if key.data is None:
+                    os.read(self._wake_read, _READ_SIZE)
+                    with self._lock:
+                        pending, self._pending = self._pending, []
+                    for fileobj, sink in pending:
+                        self._selector.register(fileobj, selectors.EVENT_READ, sink)
+                    continue
+                try:
+                    chunk = os.read(key.fd, _READ_SIZE)
+                except OSError:
+                    chunk = b''
+                if not chunk:
+                    self._selector.unregister(key.fileobj)
+                try:
+                    key.data.feed(chunk)
+                except Exception as e:
+                    print(f"[{key.data.name}] Error capturing output: {e}")
+                    if chunk:
+                        # Stop reading output that can no longer be handled
+                        self._selector.unregister(key.fileobj)
+                        try:
+                            key.data.finish()
+                        except Exception:
+                            pass
+
+
+_reactor = _OutputReactor()
 
 
 class PerfRunner:
@@ -32,7 +392,7 @@ class PerfRunner:
                  size=4096, iterations=1000, timeout=300,
                  server_ib_dev=None, server_ib_port=1, server_gid_idx=None,
                  client_ib_dev=None, client_ib_port=1, client_gid_idx=None,
-                 extra_args=None, log_dir="perf_test_logs"):
+                 extra_args=None, log_dir="perf_test_logs", pin_cpus=False, quiet=False):
         """
         Initialize a performance test runner
         
@@ -52,6 +412,10 @@ class PerfRunner:
             iterations: Number of iterations
             timeout: Timeout in seconds
             extra_args: Extra arguments to pass to perf_test
+            pin_cpus: Run server and client under taskset on two distinct CPUs
+                      (chosen by cpu_slot) to cut scheduler noise in latency results
+            quiet: Send perf_test output straight to the log files without
+                   reading or echoing it; results are analyzed from the logs
         """
         self.server_host = server_host
         self.port = port
@@ -74,47 +438,41 @@ class PerfRunner:
         self.extra_args = extra_args or []
         self.timeout = timeout
         self.log_dir = log_dir
+        self.quiet = quiet
         
         self.server_process = None
         self.client_process = None
-        self.server_output = []
-        self.client_output = []
-        self.server_thread = None
-        self.client_thread = None
+        self.server_output = deque(maxlen=_OUTPUT_TAIL)
+        self.client_output = deque(maxlen=_OUTPUT_TAIL)
+        # Log files of the current run, written while the processes run
+        self.server_log = None
+        self.client_log = None
+        # Output sinks of the running processes
+        self.server_sink = None
+        self.client_sink = None
+        self._log_timestamp = None
         self.test_success = False
+        self._reset_analysis()
+        # Set by the server capture thread once perf_test reports it is listening
+        self._server_ready = threading.Event()
+        # Upper bound on the wait for the server's listening message
+        self.server_start_timeout = 2
         
         self.perf_test_path = '/opt/habanalabs/perf-test/perf_test'
         
+        # CPUs this process may run on, only needed when pinning
+        self.cpus = sorted(os.sched_getaffinity(0)) if pin_cpus and hasattr(os, 'sched_getaffinity') else None
+        # Selects the CPU pair; runners used side by side should get distinct slots
+        self.cpu_slot = 0
+        
     def build_command_args(self, is_server=True):
         """Build command arguments for server or client"""
-        args = [self.perf_test_path]
-        
-        # Common arguments
-        if self.port:
-            args.extend(['-p', str(self.port)])
-        if self.test_type:
-            args.extend(['-t', self.test_type])
-        if self.size:
-            args.extend(['-s', str(self.size)])
-        if self.iterations:
-            args.extend(['-n', str(self.iterations)])
-        
         if is_server:
-            # Server-specific IB settings
-            if self.server_ib_dev:
-                args.extend(['-d', self.server_ib_dev])
-            if self.server_ib_port:
-                args.extend(['-i', str(self.server_ib_port)])
-            # Always use gid_idx=0 regardless of input value
-            args.extend(['-g', '0'])
+            ib_dev, ib_port = self.server_ib_dev, self.server_ib_port
         else:
-            # Client-specific IB settings
-            if self.client_ib_dev:
-                args.extend(['-d', self.client_ib_dev])
-            if self.client_ib_port:
-                args.extend(['-i', str(self.client_ib_port)])
-            # Always use gid_idx=0 regardless of input value
-            args.extend(['-g', '0'])
+            ib_dev, ib_port = self.client_ib_dev, self.client_ib_port
+        args = list(_command_template(self.perf_test_path, self.port, self.test_type,
+                                      self.size, self.iterations, ib_dev, ib_port))
             
         # Add any extra arguments
         if self.extra_args:
@@ -126,40 +484,134 @@ class PerfRunner:
             
         return args
     
-    def capture_output(self, process, output_list, name):
-        """Capture output from a process"""
+    def pin_command(self, cmd, is_server=True):
+        """
+        Prefix a command with taskset when CPU pinning is enabled.
+        Server and client of the same slot get neighbouring CPUs from the allowed set.
+        Args:
+            cmd: Command argument list
+            is_server: True for the server command, False for the client
+        Returns:
+            Command argument list to execute
+        """
+        if not self.cpus:
+            return cmd
+        cpu = self.cpus[(2 * self.cpu_slot + (0 if is_server else 1)) % len(self.cpus)]
+        return ['taskset', '-c', str(cpu)] + cmd
+    
+    def capture_output(self, process, output_list, name, ready=None, log_file=None):
+        """
+        Capture output from a process on the shared output reactor
+        
+        Args:
+            process: Popen object whose stdout is read
+            output_list: List receiving the decoded lines
+            name: Prefix used when echoing lines
+            ready: Optional threading.Event set on the first readiness line
+                   or when the output ends
+            log_file: Optional binary file receiving the raw output; closed
+                      when the output ends
+                      
+        Returns:
+            Sink whose done event is set once all output was handled
+        """
+        sink = _OutputSink(output_list, name, ready, log_file)
+        _reactor.register(process.stdout, sink)
+        return sink
+    
+    def open_log(self, role):
+        """
+        Open the log file of the current run for the server or the client.
+        The server opens a new run so both logs share one timestamp.
+        
+        Args:
+            role: "server" or "client"
+            
+        Returns:
+            Tuple of (path, binary file object)
+        """
+        if role == "server" or self._log_timestamp is None:
+            self._log_timestamp = self.get_timestamp()
+        os.makedirs(self.log_dir, exist_ok=True)
+        path = os.path.join(self.log_dir, f"{role}_{self._log_timestamp}.log")
+        return path, open(path, 'wb', buffering=_LOG_BUFFER)
+    
+    def launch(self, cmd, role, output_list, name, ready=None):
+        """
+        Start a perf_test process with its output going to the run's log file.
+        
+        Args:
+            cmd: Command argument list
+            role: "server" or "client", used for the log file name
+            output_list: List receiving the decoded lines
+            name: Prefix used when echoing lines
+            ready: Optional threading.Event set on the first readiness line
+            
+        Returns:
+            Tuple of (process, log path, output sink or None in quiet mode)
+        """
+        if self.quiet:
+            # The child writes the log itself; no pipe to read
+            log_path, log_file = self.open_log(role)
+            with log_file:
+                process = subprocess.Popen(cmd, stdout=log_file, stderr=subprocess.STDOUT,
+                                           start_new_session=True)
+            return process, log_path, None
+        
+        # Open the log first: a failure here must not leave perf_test running untracked
+        log_path, log_file = self.open_log(role)
         try:
-            for line in iter(process.stdout.readline, b''):
-                if line:
-                    decoded_line = line.decode('utf-8').strip()
-                    output_list.append(decoded_line)
-                    print(f"[{name}] {decoded_line}")
-        except Exception as e:
-            print(f"[{name}] Error capturing output: {e}")
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=0,
+                start_new_session=True
+            )
+        except BaseException:
+            log_file.close()
+            raise
+        return process, log_path, self.capture_output(process, output_list, name, ready, log_file)
+    
+    def wait_server_ready(self):
+        """
+        Wait until the server reports it is listening, at most server_start_timeout seconds
+        
+        Returns:
+            True if the server reported it is listening (or exited) in time
+        """
+        if not self.quiet:
+            return self._server_ready.wait(self.server_start_timeout)
+        # Quiet mode: look for the message in the log the server writes
+        deadline = time.monotonic() + self.server_start_timeout
+        while True:
+            with open(self.server_log, 'rb') as f:
+                if _SERVER_READY_BYTES_RE.search(f.read()):
+                    return True
+            if self.server_process.poll() is not None:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(_LOG_POLL_INTERVAL)
     
     def start_server(self):
         """Start the server process"""
         print(f"\n[{datetime.now()}] Starting server...")
-        cmd = self.build_command_args(is_server=True)
+        cmd = self.pin_command(self.build_command_args(is_server=True), is_server=True)
         print(f"Server command: {' '.join(cmd)}")
         
+        self._server_ready.clear()
+        # A new run starts with empty outputs
+        self.server_output.clear()
+        self.client_output.clear()
+        self._reset_analysis()
         try:
-            self.server_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                preexec_fn=os.setsid
-            )
+            self.server_process, self.server_log, self.server_sink = self.launch(
+                cmd, "server", self.server_output, "SERVER", self._server_ready)
             
-            self.server_thread = threading.Thread(
-                target=self.capture_output,
-                args=(self.server_process, self.server_output, "SERVER")
-            )
-            self.server_thread.daemon = True
-            self.server_thread.start()
-            
-            # Give server time to start listening
-            time.sleep(2)
+            # Wait until the server reports it is listening instead of a fixed sleep
+            if not self.wait_server_ready():
+                print(f"Server did not report listening within {self.server_start_timeout}s, starting client anyway")
             return True
             
         except Exception as e:
@@ -169,23 +621,12 @@ class PerfRunner:
     def start_client(self):
         """Start the client process"""
         print(f"\n[{datetime.now()}] Starting client...")
-        cmd = self.build_command_args(is_server=False)
+        cmd = self.pin_command(self.build_command_args(is_server=False), is_server=False)
         print(f"Client command: {' '.join(cmd)}")
         
         try:
-            self.client_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                preexec_fn=os.setsid
-            )
-            
-            self.client_thread = threading.Thread(
-                target=self.capture_output,
-                args=(self.client_process, self.client_output, "CLIENT")
-            )
-            self.client_thread.daemon = True
-            self.client_thread.start()
+            self.client_process, self.client_log, self.client_sink = self.launch(
+                cmd, "client", self.client_output, "CLIENT")
             return True
             
         except Exception as e:
@@ -196,27 +637,67 @@ class PerfRunner:
         """Wait for test completion with timeout"""
         if timeout is None:
             timeout = self.timeout
-        start_time = time.time()
-        
-        while time.time() - start_time < timeout:
-            # Check if client process has completed
-            if self.client_process and self.client_process.poll() is not None:
-                print(f"\n[{datetime.now()}] Client process completed with return code: {self.client_process.returncode}")
-                # Give server a moment to complete
-                time.sleep(2)
-                break
-                
-            time.sleep(1)
-        else:
+        
+        if self.client_process is None:
+            print("No client process to wait for")
+            return False
+        
+        # Block on the client itself; wait() returns as soon as it exits
+        try:
+            self.client_process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
             print(f"\n[{datetime.now()}] Test timeout reached ({timeout}s)")
             return False
-            
+        print(f"\n[{datetime.now()}] Client process completed with return code: {self.client_process.returncode}")
+        
+        # Give the server up to 2s to finish, returning as soon as it exits
+        if self.server_process:
+            try:
+                self.server_process.wait(timeout=2)
+            except subprocess.TimeoutExpired:
+                pass
         return True
     
+    def _reset_analysis(self):
+        """Forget what earlier analyze_results calls have classified"""
+        # Lines (or log bytes in quiet mode) of each output already classified
+        self._analyzed = {"SERVER": 0, "CLIENT": 0}
+        self._errors_found = []
+        self._success_indicators = []
+        self._metrics = []
+    
+    def _new_output(self, name, output_list, sink, log_path, process):
+        """
+        Classify the output of one process that earlier analyze_results calls
+        have not seen yet, advancing its watermark.
+        
+        Returns:
+            List of (line, set of matched group names) for lines with a match
+        """
+        start = self._analyzed[name]
+        if self.quiet and log_path:
+            # In quiet mode the output only exists in the log file
+            finished = process is None or process.poll() is not None
+            scanned, self._analyzed[name] = _scan_log(log_path, start, whole=finished)
+            return scanned
+        if sink is not None:
+            # The sink classified every line on arrival, including lines that
+            # have since dropped out of the bounded output list
+            scanned, self._analyzed[name] = sink.classified_since(start)
+            return scanned
+        lines = list(output_list)
+        self._analyzed[name] = len(lines)
+        return list(_scan_lines(lines[start:]))
+    
     def analyze_results(self):
         """Analyze test outputs to determine success/failure"""
         print(f"\n[{datetime.now()}] Analyzing results...")
         
+        # Let the reactor finish handling the output of processes that have exited
+        for process, sink in ((self.server_process, self.server_sink), (self.client_process, self.client_sink)):
+            if sink is not None and process is not None and process.poll() is not None:
+                sink.done.wait(_DRAIN_TIMEOUT)
+        
         # Check process return codes
         client_rc = self.client_process.returncode if self.client_process else -1
         server_rc = self.server_process.returncode if self.server_process else -1
@@ -224,43 +705,23 @@ class PerfRunner:
         print(f"Client return code: {client_rc}")
         print(f"Server return code: {server_rc}")
         
-        # Look for error patterns in output
-        error_patterns = [
-            r"error",
-            r"failed",
-            r"cannot",
-            r"unable",
-            r"timeout",
-            r"refused"
-        ]
-        
-        success_patterns = [
-            r"bandwidth",
-            r"latency",
-            r"completed",
-            r"success",
-            r"mbps",
-            r"gbps",
-            r"usec"
-        ]
-        
-        errors_found = []
-        success_indicators = []
+        # Results of earlier calls during this run are kept; only new output is scanned
+        errors_found = self._errors_found
+        success_indicators = self._success_indicators
+        metrics = self._metrics
         
         # Check both outputs for errors and success indicators
-        for output_list, name in [(self.server_output, "SERVER"), (self.client_output, "CLIENT")]:
-            for line in output_list:
-                line_lower = line.lower()
-                
-                # Check for errors
-                for pattern in error_patterns:
-                    if re.search(pattern, line_lower):
-                        errors_found.append(f"[{name}] {line}")
-                        
-                # Check for success indicators
-                for pattern in success_patterns:
-                    if re.search(pattern, line_lower):
-                        success_indicators.append(f"[{name}] {line}")
+        for name, output_list, sink, log_path, process in [
+                ("SERVER", self.server_output, self.server_sink, self.server_log, self.server_process),
+                ("CLIENT", self.client_output, self.client_sink, self.client_log, self.client_process)]:
+            for line, kinds in self._new_output(name, output_list, sink, log_path, process):
+                tagged = f"[{name}] {line}"
+                if 'error' in kinds:
+                    errors_found.append(tagged)
+                if 'metric' in kinds or 'done' in kinds:
+                    success_indicators.append(tagged)
+                if 'metric' in kinds:
+                    metrics.append(tagged)
         
         # Determine overall success
         if client_rc == 0 and not errors_found and success_indicators:
@@ -269,9 +730,8 @@ class PerfRunner:
             
             # Print performance metrics found
             print("\nPerformance metrics:")
-            for indicator in success_indicators:
-                if any(metric in indicator.lower() for metric in ['mbps', 'gbps', 'usec', 'bandwidth', 'latency']):
-                    print(f"  {indicator}")
+            for indicator in metrics:
+                print(f"  {indicator}")
         else:
             self.test_success = False
             print("\n✗ Test failed!")
@@ -304,8 +764,8 @@ class PerfRunner:
         """Run the complete test"""
         try:
             # Check if perf_test exists
-            if not os.path.exists(self.perf_test_path):
-                print(f"Error: perf_test not found at {self.perf_test_path}")
+            if not perf_test_available(self.perf_test_path):
+                print(f"Error: perf_test not found at {self.perf_test_path} or not executable")
                 return False
             
             # Start server
@@ -337,7 +797,16 @@ class PerfRunner:
             self.cleanup()
     
     def save_logs(self, log_dir=None):
-        """Save outputs to log files"""
+        """
+        Report the log files of the run. Output captured by start_server and
+        start_client is already in its log file; outputs gathered any other way
+        are written out here.
+        """
+        if log_dir is None and self.server_log:
+            print(f"Server log saved to: {self.server_log}")
+            if self.client_log:
+                print(f"Client log saved to: {self.client_log}")
+            return
         if log_dir is None:
             log_dir = self.log_dir
         os.makedirs(log_dir, exist_ok=True)
@@ -346,13 +815,13 @@ class PerfRunner:
         # Save server log
         server_log = os.path.join(log_dir, f"server_{timestamp}.log")
         with open(server_log, 'w') as f:
-            f.write('\n'.join(self.server_output))
+            f.writelines(f"{line}\n" for line in self.server_output)
         print(f"Server log saved to: {server_log}")
         
         # Save client log
         client_log = os.path.join(log_dir, f"client_{timestamp}.log")
         with open(client_log, 'w') as f:
-            f.write('\n'.join(self.client_output))
+            f.writelines(f"{line}\n" for line in self.client_output)
         print(f"Client log saved to: {client_log}")
     
     @staticmethod
@@ -360,12 +829,47 @@ class PerfRunner:
         """Get current timestamp as string"""
         return datetime.now().strftime("%Y%m%d_%H%M%S")
     
-    def run_multiple_tests(self, connections):
+    def for_connection(self, src, dst, slot=0, server_host=None):
+        """
+        Create a runner with this runner's settings for one connection.
+        Runners used at the same time need distinct slots: the slot offsets the
+        TCP port and selects the CPU pair when pinning.
+        
+        Args:
+            src: Source endpoint dictionary (ib_name, port, gid)
+            dst: Destination endpoint dictionary (ib_name, port, gid)
+            slot: Index of the runner among those running concurrently
+            server_host: Host the client connects to; the source GID if None
+            
+        Returns:
+            PerfRunner configured for the connection
+        """
+        name = f"{src.get('ib_name')}-p{src.get('port')}_{dst.get('ib_name')}-p{dst.get('port')}"
+        runner = PerfRunner(server_host=server_host or src.get('gid'), port=self.port + slot,
+                            test_type=self.test_type, size=self.size,
+                            iterations=self.iterations, timeout=self.timeout,
+                            server_ib_dev=src.get('ib_name'), server_ib_port=src.get('port'),
+                            client_ib_dev=dst.get('ib_name'), client_ib_port=dst.get('port'),
+                            extra_args=list(self.extra_args), quiet=self.quiet,
+                            # Separate directory per connection so concurrent logs never collide
+                            log_dir=os.path.join(self.log_dir, name))
+        runner.perf_test_path = self.perf_test_path
+        runner.server_start_timeout = self.server_start_timeout
+        runner.cpus = self.cpus
+        runner.cpu_slot = slot
+        return runner
+    
+    def run_multiple_tests(self, connections, max_parallel=1):
         """
         Run performance tests on multiple connections.
+        Tests run one at a time unless max_parallel is raised: then connections
+        that share no IB device port run at the same time, each on its own
+        PerfRunner, and connections that do share one go to later rounds.
         
         Args:
             connections: List of connection dictionaries with source and destination info
+            max_parallel: Maximum number of tests running at once (concurrency
+                          can skew bandwidth and latency results)
             
         Returns:
             Dict with summary and detailed results for each connection
@@ -377,54 +881,60 @@ class PerfRunner:
         
         print(f"\nRunning performance tests on {len(connections)} connections...")
         
+        # Validate all connections up front, then group them into rounds
+        jobs = []
         for i, connection in enumerate(connections):
-            print(f"\nConnection {i+1}/{len(connections)}")
-            
             if not connection.get('source') or not connection.get('destination'):
-                print("Error: Connection missing source or destination information")
+                print(f"Error: Connection {i+1} missing source or destination information")
                 error_count += 1
                 continue
             
-            # Configure for this specific connection
             src = connection['source']
             dst = connection['destination']
             
-            # Update IB settings for this connection
-            self.server_ib_dev = src.get('ib_name')
-            self.server_ib_port = src.get('port')
-            self.client_ib_dev = dst.get('ib_name')
-            self.client_ib_port = dst.get('port')
-            
-            # Always ensure GID index is 0 for both server and client
-            self.server_gid_idx = 0
-            self.client_gid_idx = 0
-            
             # The server host is set to the source GID
             # Skip connections without valid GID information
-            if 'gid' not in src or not src.get('gid'):
-                print("Skipping connection due to missing source GID")
+            if not src.get('gid'):
+                print(f"Skipping connection {i+1} due to missing source GID")
                 error_count += 1
                 continue
-                
-            self.server_host = src.get('gid')
             
-            # Run the test
-            result = self.run()
+            jobs.append((i, src, dst))
+        
+        rounds = plan_rounds([{(src.get('ib_name'), src.get('port')), (dst.get('ib_name'), dst.get('port'))}
+                              for _, src, dst in jobs], max_parallel)
+        
+        for test_round in rounds:
+            test_round = [jobs[j] for j in test_round]
+            runners = []
+            for slot, (i, src, dst) in enumerate(test_round):
+                print(f"\nConnection {i+1}/{len(connections)}")
+                runners.append(self.for_connection(src, dst, slot))
             
-            if result:
-                # Enhance result with connection info
-                test_result = {
-                    'status': 'success' if result else 'failed',
-                    'source': f"{src.get('ib_name')}:port{src.get('port')} (GID: {src.get('gid')})",
-                    'destination': f"{dst.get('ib_name')}:port{dst.get('port')} (GID: {dst.get('gid')})"
-                }
-                results.append(test_result)
-                if result:
-                    success_count += 1
+            for (i, src, dst), result in zip(test_round, run_round(runners)):
+                if isinstance(result, Exception):
+                    print(f"Error: Exception during performance test on connection {i+1}: {result}")
+                    error_count += 1
+                    results.append({
+                        'status': 'error',
+                        'error': str(result),
+                        'source': f"{src.get('ib_name')}:port{src.get('port')}",
+                        'destination': f"{dst.get('ib_name')}:port{dst.get('port')}"
+                    })
+                elif result:
+                    # Enhance result with connection info
+                    test_result = {
+                        'status': 'success' if result else 'failed',
+                        'source': f"{src.get('ib_name')}:port{src.get('port')} (GID: {src.get('gid')})",
+                        'destination': f"{dst.get('ib_name')}:port{dst.get('port')} (GID: {dst.get('gid')})"
+                    }
+                    results.append(test_result)
+                    if result:
+                        success_count += 1
+                    else:
+                        failure_count += 1
                 else:
-                    failure_count += 1
-            else:
-                error_count += 1
+                    error_count += 1
         
         # Print summary
         print("\n" + "="*50)
@@ -3,15 +3,16 @@ import pytest
 import tempfile
 from unittest.mock import patch, MagicMock
 
+@pytest.fixture(scope="session")
+def mock_csv_content():
+    """Mock connectivity CSV contents, for parsing from memory via io.StringIO."""
+    return "0\t1\t1\t1\n1\t2\t2\t2\n2\t3\t3\t3\n# This is a comment\n3\t4\t4\t4\n"
+
 @pytest.fixture
-def mock_csv_file():
-    """Create a temporary mock CSV file for testing."""
+def mock_csv_file(mock_csv_content):
+    """Create a temporary mock CSV file for testing (per test, since tests modify it)."""
     with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.csv') as temp:
-        temp.write("0\t1\t1\t1\n")
-        temp.write("1\t2\t2\t2\n")
-        temp.write("2\t3\t3\t3\n")
-        temp.write("# This is a comment\n")
-        temp.write("3\t4\t4\t4\n")
+        temp.write(mock_csv_content)
         temp_path = temp.name
     
     yield temp_path
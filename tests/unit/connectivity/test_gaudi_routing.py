@@ -1,6 +1,6 @@
 import os
 import pytest
-from src.connectivity.GaudiRouting import GaudiRouting
+from src.connectivity.GaudiRouting import GaudiRouting, get_routing
 
 class TestGaudiRouting:
     def test_init_with_default_file(self, monkeypatch):
@@ -62,4 +62,118 @@ class TestGaudiRouting:
         assert 'source' in matches[0]
         assert 'destination' in matches[0]
         assert 'source_device_id' in matches[0]
-        assert 'dest_device_id' in matches[0]
\ No newline at end of file
+        assert 'dest_device_id' in matches[0]
+
+    def test_parse_uses_cache_dir(self, mock_csv_file, monkeypatch, tmp_path):
+        from src.connectivity import GaudiRouting as routing_module
+        routing_module._load_connections.cache_clear()
+        monkeypatch.setenv("GAUDI_CACHE_DIR", str(tmp_path / "cache"))
+        GaudiRouting(mock_csv_file).get_connections()
+        cache_files = list((tmp_path / "cache").iterdir())
+        assert [path.suffix for path in cache_files] == [".npz"]
+        # Nothing is written next to the CSV
+        assert not [name for name in os.listdir(os.path.dirname(mock_csv_file))
+                    if name.startswith(os.path.basename(mock_csv_file) + ".")]
+
+        # A fresh process would load the .npz instead of running the CSV parser
+        routing_module._load_connections.cache_clear()
+        def fail_parse(path):
+            raise AssertionError("CSV should not be re-parsed when the cache is fresh")
+        monkeypatch.setattr(routing_module, "_parse_csv", fail_parse)
+        routing = GaudiRouting(mock_csv_file)
+        assert routing.src_mod.tolist() == [0, 1, 2, 3]
+
+    def test_parse_cache_invalidated_on_change(self, mock_csv_file, monkeypatch, tmp_path):
+        monkeypatch.setenv("GAUDI_CACHE_DIR", str(tmp_path))
+        assert len(GaudiRouting(mock_csv_file).connections) == 4
+        with open(mock_csv_file, 'a') as f:
+            f.write("4\t5\t5\t5\n")
+        st = os.stat(mock_csv_file)
+        os.utime(mock_csv_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1))
+        assert len(GaudiRouting(mock_csv_file).connections) == 5
+
+    def test_connection_columns(self, mock_csv_file):
+        routing = GaudiRouting(mock_csv_file)
+        assert routing.src_mod.tolist() == [0, 1, 2, 3]
+        assert routing.src_port.tolist() == [1, 2, 3, 4]
+        assert routing.dst_mod.tolist() == [1, 2, 3, 4]
+        assert routing.dst_port.tolist() == [1, 2, 3, 4]
+        assert routing.src_mod.dtype == "int32"
+
+    def test_match_devices_to_connections_selects_known_modules(self, mock_csv_file):
+        routing = GaudiRouting(mock_csv_file)
+        devices = {
+            "0000:4d:00.0": {"module_id": 0, "bus_id": "0000:4d:00.0"},
+            "0000:4e:00.0": {"module_id": 1, "bus_id": "0000:4e:00.0"},
+            "0000:4f:00.0": {"module_id": 2, "bus_id": "0000:4f:00.0"}
+        }
+
+        matches = routing.match_devices_to_connections(devices)
+        # 2->3 and 3->4 reference modules that were not discovered
+        assert [(m['source']['module_id'], m['destination']['module_id']) for m in matches] == [(0, 1), (1, 2)]
+        assert matches[0]['source_device_id'] == "0000:4d:00.0"
+        assert matches[0]['dest_device_id'] == "0000:4e:00.0"
+        assert matches[1]['source']['port'] == 2
+
+    def test_get_routing_shares_instance(self, mock_csv_file):
+        routing = get_routing(mock_csv_file)
+
+        assert isinstance(routing, GaudiRouting)
+        assert get_routing(mock_csv_file) is routing
+        assert len(routing.connections) == 4
+
+    def test_parse_is_lazy(self, mock_csv_file, monkeypatch, capsys):
+        calls = []
+        original = GaudiRouting.parse_connectivity_file
+        def counting_parse(self, csv_path=None):
+            calls.append(csv_path)
+            return original(self, csv_path)
+        monkeypatch.setattr(GaudiRouting, "parse_connectivity_file", counting_parse)
+
+        routing = GaudiRouting(mock_csv_file)
+        assert calls == []
+
+        assert len(routing.get_connections()) == 4
+        assert routing.src_mod.tolist() == [0, 1, 2, 3]
+        assert len(calls) == 1
+        # First use is the normal path, not worth announcing on stdout
+        assert "No connections parsed yet" not in capsys.readouterr().out
+
+    def test_parse_from_file_like(self, mock_csv_content):
+        import io
+        routing = GaudiRouting(io.StringIO(mock_csv_content))
+        assert routing.src_mod.tolist() == [0, 1, 2, 3]
+        assert routing.dst_port.tolist() == [1, 2, 3, 4]
+
+        # Ragged rows fall back to the line reader on the same stream
+        routing = GaudiRouting(io.BytesIO(b"0\t1\t1\t1\n1\t2\n2\t3\t3\t3\n"))
+        assert routing.src_mod.tolist() == [0, 2]
+
+    def test_parse_rows_skips_malformed_lines(self, tmp_path, capsys):
+        from src.connectivity.GaudiRouting import _parse_csv_rows
+        csv_path = tmp_path / "connectivity.csv"
+        csv_path.write_bytes(b"# header\n0\t1\t1\t1\n\n1\t2\n2\tx\t3\t3\n3\t\t4\t4\t4\n")
+
+        table = _parse_csv_rows(str(csv_path))
+
+        assert table.tolist() == [[0, 1, 1, 1], [3, 4, 4, 4]]
+        out = capsys.readouterr().out
+        assert "Skipping line 4" in out
+        assert "Invalid connection format at line 5" in out
+
+    def test_parse_falls_back_on_ragged_rows(self, tmp_path):
+        from src.connectivity.GaudiRouting import _parse_csv
+        csv_path = tmp_path / "connectivity.csv"
+        csv_path.write_text("0\t1\t1\t1\n1\t2\n2\t3\t3\t3\n")
+
+        assert _parse_csv(str(csv_path)).tolist() == [[0, 1, 1, 1], [2, 3, 3, 3]]
+
+    def test_match_mask(self):
+        import numpy as np
+        from src.connectivity.GaudiRouting import _match_mask
+        src_mod = np.array([0, 1, 5, 2, 9], dtype=np.int32)
+        dst_mod = np.array([1, 1, 0, 0, 2], dtype=np.int32)
+
+        mask = _match_mask(src_mod, dst_mod, np.array([0, 1, 2], dtype=np.int32))
+        assert mask.tolist() == [True, False, False, True, False]
+        assert not _match_mask(src_mod, dst_mod, np.array([], dtype=np.int32)).any()
@@ -0,0 +1,89 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from src.devices.GaudiDevices import GaudiDevices
+from src.devices.InfinibandDevices import Port
+
+HL_SMI_OUTPUT = """index, module_id, bus_id
+0, 2, 0000:4d:00.0
+1, 0, 0000:4e:00.0
+2, 1, 0000:4f:00.0
+"""
+
+
+@pytest.fixture
+def gaudi_devices():
+    """GaudiDevices populated from canned hl-smi output, without scanning InfiniBand."""
+    with patch('src.devices.GaudiDevices.subprocess.run') as mock_run, \
+         patch('src.devices.InfinibandDevices.InfinibandDevices'):
+        mock_run.return_value = MagicMock(stdout=HL_SMI_OUTPUT)
+        yield GaudiDevices()
+
+
+class TestGaudiDevices:
+    def test_parse_gaudi_devices(self, gaudi_devices):
+        devices = gaudi_devices.get_devices()
+        assert list(devices) == ["0000:4d:00.0", "0000:4e:00.0", "0000:4f:00.0"]
+        assert devices["0000:4d:00.0"].module_id == 2
+        assert devices["0000:4d:00.0"].device_id == 0
+        assert devices["0000:4d:00.0"].ports == {}
+
+    def test_get_device_by_module_id(self, gaudi_devices):
+        assert gaudi_devices.get_device_by_module_id(0).bus_id == "0000:4e:00.0"
+        assert gaudi_devices.get_device_by_module_id(2).bus_id == "0000:4d:00.0"
+        assert gaudi_devices.get_device_by_module_id(7) is None
+
+    def test_active_ports(self, gaudi_devices):
+        gaudi_devices.get_device_by_bus_id("0000:4d:00.0").update_device_info({
+            'ports': [
+                Port(1, '4: ACTIVE', True, 'Ethernet'),
+                Port(2, '1: DOWN', False, 'Ethernet'),
+            ]
+        })
+
+        assert gaudi_devices.get_device_by_bus_id("0000:4d:00.0").active_ports == frozenset({1})
+        # Devices without InfiniBand info have no active ports
+        assert gaudi_devices.get_device_by_bus_id("0000:4e:00.0").active_ports == frozenset()
+
+    def test_hlsmi_output_cached_in_gaudi_cache_dir(self, tmp_path, monkeypatch):
+        hlsmi = tmp_path / "hl-smi"
+        hlsmi.write_text("")
+        monkeypatch.setenv("GAUDI_CACHE_DIR", str(tmp_path / "cache"))
+        monkeypatch.setattr('src.devices.GaudiDevices.shutil.which', lambda name: str(hlsmi))
+
+        with patch('src.devices.GaudiDevices.subprocess.run') as mock_run, \
+             patch('src.devices.InfinibandDevices.InfinibandDevices'):
+            mock_run.return_value = MagicMock(stdout=HL_SMI_OUTPUT)
+            GaudiDevices()
+            devices = GaudiDevices().get_devices()
+
+        mock_run.assert_called_once()
+        assert len(devices) == 3
+        assert (tmp_path / "cache" / "hlsmi_devices.json").exists()
+
+    def test_devices_are_slotted(self, gaudi_devices):
+        device = gaudi_devices.get_device_by_module_id(0)
+        assert not hasattr(device, '__dict__')
+        with pytest.raises(AttributeError):
+            device.unknown_attribute = 1
+
+    def test_get_device_mapping(self, gaudi_devices):
+        gaudi_devices.get_device_by_module_id(0).update_device_info({'ib_name': 'hbl_1', 'vendor_id': '1da3'})
+
+        mapping = gaudi_devices.get_device_mapping()
+        assert mapping == {2: (0, None), 0: (1, 'hbl_1'), 1: (2, None)}
+        assert gaudi_devices.get_device_mapping() is mapping
+        assert gaudi_devices.get_device_by_module_id(0).vendor_id == '1da3'
+
+    def test_empty_hlsmi_output(self):
+        with patch('src.devices.GaudiDevices.subprocess.run') as mock_run, \
+             patch('src.devices.InfinibandDevices.InfinibandDevices'):
+            mock_run.return_value = MagicMock(stdout="")
+            assert GaudiDevices().get_devices() == {}
+
+    def test_duplicate_module_id_keeps_first_device(self):
+        with patch('src.devices.GaudiDevices.subprocess.run') as mock_run, \
+             patch('src.devices.InfinibandDevices.InfinibandDevices'):
+            mock_run.return_value = MagicMock(stdout=HL_SMI_OUTPUT + "3, 2, 0000:50:00.0\n")
+            gaudi_devices = GaudiDevices()
+
+        assert gaudi_devices.get_device_by_module_id(2).bus_id == "0000:4d:00.0"
@@ -0,0 +1,100 @@
+import os
+import pytest
+from unittest.mock import MagicMock
+from src.devices.InfinibandDevices import InfinibandDevices, Port
+
+
+def _make_ib_device(root, pci_chain, vendor, ib_name, ports):
+    """Build a fake sysfs tree for one InfiniBand device and link it into class/infiniband."""
+    pci_dir = root.joinpath("devices", *pci_chain)
+    pci_dir.mkdir(parents=True, exist_ok=True)
+    (pci_dir / "vendor").write_text(f"0x{vendor}\n")
+    dev_dir = pci_dir / "infiniband" / ib_name
+    for port_num, (state, link_layer) in ports.items():
+        port_dir = dev_dir / "ports" / str(port_num)
+        port_dir.mkdir(parents=True)
+        (port_dir / "state").write_text(f"{state}\n")
+        (port_dir / "link_layer").write_text(f"{link_layer}\n")
+    class_dir = root / "class" / "infiniband"
+    class_dir.mkdir(parents=True, exist_ok=True)
+    os.symlink(dev_dir, class_dir / ib_name)
+
+
+class TestInfinibandDevices:
+    @pytest.fixture
+    def sysfs(self, tmp_path):
+        _make_ib_device(tmp_path, ["pci0000:00", "0000:00:01.0", "0000:4d:00.0"], "1da3", "hbl_0",
+                        {1: ("4: ACTIVE", "Ethernet"), 2: ("1: DOWN", "Ethernet")})
+        _make_ib_device(tmp_path, ["pci0000:00", "0000:17:00.0"], "15b3", "mlx5_0",
+                        {1: ("4: ACTIVE", "InfiniBand")})
+        return tmp_path
+
+    def test_get_infiniband_devices(self, sysfs):
+        gaudi_device = MagicMock()
+        gaudi_devices = MagicMock()
+        gaudi_devices.get_device_by_bus_id.side_effect = lambda bus_id: gaudi_device if bus_id == "0000:4d:00.0" else None
+
+        ib = InfinibandDevices()
+        ib.ib_path = str(sysfs / "class" / "infiniband")
+        devices = ib.get_infiniband_devices(gaudi_devices)
+
+        assert list(devices["gaudi"]) == ["0000:4d:00.0"]
+        assert list(devices["other"]) == ["0000:17:00.0"]
+        device_info = gaudi_device.update_device_info.call_args[0][0]
+        assert device_info["ib_name"] == "hbl_0"
+        assert device_info["vendor_id"] == "1da3"
+
+    def test_gather_port_info(self, sysfs):
+        ib = InfinibandDevices()
+        ports = ib._gather_port_info(str(sysfs / "class" / "infiniband" / "hbl_0"))
+        ports = {port.port_num: port for port in ports}
+
+        assert ports[1].is_active is True
+        assert ports[1].state == "4: ACTIVE"
+        assert ports[1].link_layer == "Ethernet"
+        assert ports[2].is_active is False
+
+    def test_gather_port_info_missing_ports_dir(self, tmp_path):
+        ib = InfinibandDevices()
+        assert ib._gather_port_info(str(tmp_path)) == []
+
+    def test_missing_ib_path(self, tmp_path):
+        ib = InfinibandDevices()
+        ib.ib_path = str(tmp_path / "missing")
+        assert ib.get_infiniband_devices(MagicMock()) == {"gaudi": {}, "other": {}}
+
+    def test_gather_port_info_missing_attributes(self, sysfs):
+        port_dir = sysfs / "class" / "infiniband" / "hbl_0" / "ports" / "2"
+        (port_dir / "state").unlink()
+        (port_dir / "link_layer").unlink()
+
+        ib = InfinibandDevices()
+        ports = {port.port_num: port for port in ib._gather_port_info(str(sysfs / "class" / "infiniband" / "hbl_0"))}
+
+        assert ports[2] == Port(2, "Unknown", False, "Unknown")
+        assert ports[1].is_active is True
+
+    def test_pci_re_uses_last_bus_id(self):
+        from src.devices.InfinibandDevices import _PCI_RE
+        path = "/sys/devices/pci0000:00/0000:00:01.0/0000:4d:00.0/infiniband/hbl_0"
+        match = _PCI_RE.match(path)
+        assert match.group(1) == "0000:4d:00.0"
+        assert path[:match.end(1)] == "/sys/devices/pci0000:00/0000:00:01.0/0000:4d:00.0"
+        assert _PCI_RE.match("/sys/devices/virtual/infiniband/rxe0") is None
+
+    def test_get_vendor_id_is_cached(self, sysfs, monkeypatch):
+        from src.devices import InfinibandDevices as ib_module
+        pci_path = str(sysfs / "devices" / "pci0000:00" / "0000:17:00.0")
+        ib = InfinibandDevices()
+        assert ib._get_vendor_id(pci_path) == "15b3"
+
+        def fail_read(path):
+            raise AssertionError("vendor file should not be read again")
+        monkeypatch.setattr(ib_module, "_readtiny", fail_read)
+        assert ib._get_vendor_id(pci_path) == "15b3"
+
+    def test_readtiny(self, tmp_path):
+        from src.devices.InfinibandDevices import _readtiny
+        (tmp_path / "state").write_text("4: ACTIVE\n")
+        assert _readtiny(str(tmp_path / "state")) == "4: ACTIVE"
+        assert _readtiny(str(tmp_path / "missing")) is None
@@ -0,0 +1,368 @@
+import os
+import subprocess
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+from src.runner import PerfRunner as perf_runner_module
+from src.runner.PerfRunner import PerfRunner
+
+
+def pipe_process(*chunks):
+    """Mock process whose stdout is a real pipe already holding the given chunks"""
+    read_fd, write_fd = os.pipe()
+    for chunk in chunks:
+        os.write(write_fd, chunk)
+    os.close(write_fd)
+    process = MagicMock()
+    process.stdout = os.fdopen(read_fd, 'rb', 0)
+    return process
+
+
+@pytest.fixture
+def runner(tmp_path):
+    runner = PerfRunner(log_dir=str(tmp_path / "logs"))
+    runner.server_process = MagicMock(returncode=0)
+    runner.client_process = MagicMock(returncode=0)
+    return runner
+
+
+class TestPerfRunner:
+    def test_analyze_results_success(self, runner, capsys):
+        runner.server_output = ["Server is Listening...", "Test completed"]
+        runner.client_output = ["Average Latency: 3.21 [us]", "Bandwidth: 98.5 Gbps"]
+
+        runner.analyze_results()
+
+        assert runner.test_success is True
+        out = capsys.readouterr().out
+        assert "[CLIENT] Bandwidth: 98.5 Gbps" in out
+        assert "[SERVER] Test completed" not in out.split("Performance metrics:")[1]
+
+    def test_analyze_results_error(self, runner, capsys):
+        runner.server_output = ["Listen Failed !"]
+        runner.client_output = ["Average Latency: 3.21 [us]"]
+
+        runner.analyze_results()
+
+        assert runner.test_success is False
+        assert "[SERVER] Listen Failed !" in capsys.readouterr().out
+
+    def test_analyze_results_requires_indicator(self, runner):
+        runner.server_output = []
+        runner.client_output = ["done"]
+
+        runner.analyze_results()
+
+        assert runner.test_success is False
+
+    def test_build_command_args(self):
+        runner = PerfRunner(server_host='10.0.0.1', server_ib_dev='hbl_0', server_ib_port=2,
+                            client_ib_dev='hbl_1', client_ib_port=3)
+
+        assert runner.build_command_args(is_server=True)[1:] == [
+            '-p', '18515', '-t', 'pp', '-s', '4096', '-n', '1000', '-d', 'hbl_0', '-i', '2', '-g', '0']
+        assert runner.build_command_args(is_server=False)[1:] == [
+            '-p', '18515', '-t', 'pp', '-s', '4096', '-n', '1000', '-d', 'hbl_1', '-i', '3', '-g', '0', '10.0.0.1']
+
+    def test_save_logs(self, runner, tmp_path):
+        runner.server_output = ["Server is Listening...", "done"]
+        runner.client_output = ["Average Latency: 3.21 [us]"]
+
+        runner.save_logs()
+
+        logs = {path.name.split('_')[0]: path.read_text() for path in (tmp_path / "logs").iterdir()}
+        assert logs == {"server": "Server is Listening...\ndone\n", "client": "Average Latency: 3.21 [us]\n"}
+
+    def test_start_server_waits_for_listening_line(self, runner):
+        server = pipe_process(b"Server is Listening...\n")
+        runner.server_start_timeout = 5
+
+        with patch('src.runner.PerfRunner.subprocess.Popen', return_value=server):
+            assert runner.start_server() is True
+
+        assert runner._server_ready.is_set()
+        assert runner.server_sink.done.wait(1)
+        assert list(runner.server_output) == ["Server is Listening..."]
+
+    def test_start_client_uses_new_session(self, runner):
+        client = pipe_process()
+
+        with patch('src.runner.PerfRunner.subprocess.Popen', return_value=client) as mock_popen:
+            assert runner.start_client() is True
+
+        kwargs = mock_popen.call_args.kwargs
+        assert kwargs['start_new_session'] is True
+        assert 'preexec_fn' not in kwargs
+
+    def test_build_command_args_follows_updated_settings(self):
+        runner = PerfRunner(server_ib_dev='hbl_0', client_ib_dev='hbl_1', extra_args=['-c', '1'])
+
+        runner.build_command_args(is_server=True).append('mutated')
+        assert 'mutated' not in runner.build_command_args(is_server=True)
+
+        runner.server_ib_dev = 'hbl_2'
+        assert runner.build_command_args(is_server=True)[1:] == [
+            '-p', '18515', '-t', 'pp', '-s', '4096', '-n', '1000', '-d', 'hbl_2', '-i', '1', '-g', '0', '-c', '1']
+
+    def test_pin_command(self):
+        runner = PerfRunner()
+        assert runner.pin_command(['perf_test']) == ['perf_test']
+
+        runner.cpus = [2, 3, 6]
+        runner.cpu_slot = 1
+        assert runner.pin_command(['perf_test'], is_server=True) == ['taskset', '-c', '6', 'perf_test']
+        assert runner.pin_command(['perf_test'], is_server=False) == ['taskset', '-c', '2', 'perf_test']
+
+    def test_wait_for_completion_blocks_on_client(self, runner):
+        runner.client_process.wait.return_value = 0
+        runner.server_process.wait.side_effect = subprocess.TimeoutExpired('perf_test', 2)
+
+        with patch('src.runner.PerfRunner.time.sleep') as mock_sleep:
+            assert runner.wait_for_completion(timeout=5) is True
+
+        mock_sleep.assert_not_called()
+        runner.client_process.wait.assert_called_once_with(timeout=5)
+        runner.server_process.wait.assert_called_once_with(timeout=2)
+
+    def test_wait_for_completion_times_out(self, runner, capsys):
+        runner.client_process.wait.side_effect = subprocess.TimeoutExpired('perf_test', 2)
+
+        assert runner.wait_for_completion(timeout=2) is False
+
+        assert "Test timeout reached (2s)" in capsys.readouterr().out
+        runner.server_process.wait.assert_not_called()
+
+    def test_capture_output_splits_chunks_into_lines(self, runner, capsys):
+        process = pipe_process(b"Server is Lis", b"tening...\r\nwaiting\n\nlast line")
+        output = []
+
+        assert runner.capture_output(process, output, "SERVER").done.wait(1)
+
+        assert output == ["Server is Listening...", "waiting", "", "last line"]
+        assert "[SERVER] last line" in capsys.readouterr().out
+
+    def test_run_multiple_tests_runs_disjoint_pairs_together(self, tmp_path):
+        runner = PerfRunner(log_dir=str(tmp_path), port=20000)
+        def endpoint(dev, port, gid='fe80::1'):
+            return {'ib_name': dev, 'port': port, 'gid': gid}
+        connections = [
+            {'source': endpoint('hbl_0', 1), 'destination': endpoint('hbl_1', 1)},
+            {'source': endpoint('hbl_2', 1), 'destination': endpoint('hbl_3', 1)},
+            # Shares hbl_0 port 1 with the first connection
+            {'source': endpoint('hbl_0', 1), 'destination': endpoint('hbl_2', 2)},
+            {'source': endpoint('hbl_4', 1, gid=None), 'destination': endpoint('hbl_5', 1)},
+            {'source': endpoint('hbl_6', 1)},
+        ]
+        started = []
+        def fake_run(self):
+            started.append((self.server_ib_dev, self.client_ib_dev, self.port, self.cpu_slot))
+            return self.client_ib_dev != 'hbl_3'
+
+        with patch.object(PerfRunner, 'run', fake_run):
+            result = runner.run_multiple_tests(connections, max_parallel=8)
+
+        assert sorted(started) == [('hbl_0', 'hbl_1', 20000, 0), ('hbl_0', 'hbl_2', 20000, 0), ('hbl_2', 'hbl_3', 20001, 1)]
+        assert result['summary'] == {'total': 5, 'success': 2, 'failure': 0, 'error': 3}
+        assert [d['destination'].split(':')[0] for d in result['details']] == ['hbl_1', 'hbl_2']
+
+    def test_output_is_streamed_to_log_files(self, runner, capsys):
+        server = pipe_process(b"Server is Listening...\n", b"done\n")
+        client = pipe_process(b"Average Latency: 3.21 [us]\n")
+
+        with patch('src.runner.PerfRunner.subprocess.Popen', side_effect=[server, client]):
+            assert runner.start_server() is True
+            assert runner.start_client() is True
+        assert runner.server_sink.done.wait(1)
+        assert runner.client_sink.done.wait(1)
+
+        with open(runner.server_log, 'rb') as f:
+            assert f.read() == b"Server is Listening...\ndone\n"
+        with open(runner.client_log, 'rb') as f:
+            assert f.read() == b"Average Latency: 3.21 [us]\n"
+        assert list(runner.client_output) == ["Average Latency: 3.21 [us]"]
+
+        runner.save_logs()
+        assert f"Client log saved to: {runner.client_log}" in capsys.readouterr().out
+
+    def test_run_fails_without_perf_test(self, capsys):
+        runner = PerfRunner()
+        runner.perf_test_path = '/nonexistent/perf_test'
+
+        with patch('src.runner.PerfRunner.subprocess.Popen') as mock_popen:
+            assert runner.run() is False
+
+        mock_popen.assert_not_called()
+        assert "perf_test not found at /nonexistent/perf_test" in capsys.readouterr().out
+
+    def test_perf_test_available_only_caches_hits(self, tmp_path):
+        perf_test = str(tmp_path / "perf_test")
+        assert perf_runner_module.perf_test_available(perf_test) is False
+
+        # Installed later in the same process: picked up on the next check
+        with open(perf_test, 'w') as f:
+            f.write("#!/bin/sh\n")
+        assert perf_runner_module.perf_test_available(perf_test) is False
+        os.chmod(perf_test, 0o755)
+        assert perf_runner_module.perf_test_available(perf_test) is True
+
+        with patch('src.runner.PerfRunner.os.stat') as mock_stat:
+            assert perf_runner_module.perf_test_available(perf_test) is True
+        mock_stat.assert_not_called()
+
+    def test_scan_log_tags_each_line_once(self, tmp_path):
+        from src.runner.PerfRunner import _scan_log
+        log = tmp_path / "server.log"
+        log.write_bytes(b"Server is Listening...\nBandwidth: 98 Gbps\nnothing\nconnect FAILED, timeout")
+
+        assert _scan_log(str(log)) == (
+            [("Bandwidth: 98 Gbps", {"metric"}), ("connect FAILED, timeout", {"error"})], 73)
+        # A process still writing: the unterminated last line waits for the next scan
+        assert _scan_log(str(log), start=23, whole=False) == ([("Bandwidth: 98 Gbps", {"metric"})], 50)
+        assert _scan_log(str(log), start=50) == ([("connect FAILED, timeout", {"error"})], 73)
+        (tmp_path / "empty.log").write_bytes(b"")
+        assert _scan_log(str(tmp_path / "empty.log")) == ([], 0)
+
+    def test_quiet_run_analyzes_log_files(self, tmp_path, capsys):
+        fake_perf_test = tmp_path / "perf_test"
+        fake_perf_test.write_text("#!/bin/sh\necho 'Server is Listening...'\necho 'Average Latency: 3.21 [us]'\n")
+        fake_perf_test.chmod(0o755)
+        runner = PerfRunner(log_dir=str(tmp_path / "logs"), quiet=True)
+        runner.perf_test_path = str(fake_perf_test)
+
+        assert runner.start_server() is True
+        assert runner.start_client() is True
+        assert runner.wait_for_completion(timeout=10) is True
+        runner.analyze_results()
+
+        assert runner.test_success is True
+        assert runner.server_sink is None and list(runner.client_output) == []
+        out = capsys.readouterr().out
+        assert "[CLIENT] Average Latency: 3.21 [us]" in out
+        assert "[SERVER] Server is Listening..." not in out
+
+    def test_analyze_results_scans_only_new_lines(self, runner, capsys):
+        runner.server_output = ["Server is Listening..."]
+        runner.client_output = ["Average Latency: 3.21 [us]"]
+        runner.analyze_results()
+        assert runner.test_success is True
+
+        runner.client_output.append("Bandwidth: 98.5 Gbps")
+        with patch('src.runner.PerfRunner._scan_lines', wraps=perf_runner_module._scan_lines) as mock_scan:
+            runner.analyze_results()
+        assert runner.test_success is True
+        assert [list(c.args[0]) for c in mock_scan.call_args_list] == [["Bandwidth: 98.5 Gbps"]]
+        metrics = capsys.readouterr().out.rsplit("Performance metrics:", 1)[1]
+        assert metrics.count("Average Latency") == 1 and "Bandwidth: 98.5 Gbps" in metrics
+
+        runner.server_output.append("Listen Failed !")
+        runner.analyze_results()
+        assert runner.test_success is False
+
+    def test_capture_output_echoes_each_chunk_with_one_write(self, runner):
+        process = pipe_process(b"one\ntwo\nthree\n")
+
+        with patch('src.runner.PerfRunner.sys.stdout') as mock_stdout:
+            assert runner.capture_output(process, [], "CLIENT").done.wait(1)
+
+        mock_stdout.write.assert_called_once_with("[CLIENT] one\n[CLIENT] two\n[CLIENT] three\n")
+
+    def test_run_round_runs_single_test_inline(self):
+        runner = MagicMock()
+        runner.run.side_effect = lambda: threading.current_thread() is threading.main_thread()
+
+        assert perf_runner_module.run_round([runner]) == [True]
+
+    def test_run_round_reports_exceptions_per_test(self):
+        ok, broken = MagicMock(), MagicMock()
+        ok.run.return_value = True
+        broken.run.side_effect = RuntimeError("boom")
+
+        outcomes = perf_runner_module.run_round([ok, broken])
+
+        assert outcomes[0] is True
+        assert isinstance(outcomes[1], RuntimeError)
+
+    def test_run_round_cleans_up_on_interrupt(self):
+        runners = [MagicMock(), MagicMock()]
+        with patch('src.runner.PerfRunner.ThreadPoolExecutor') as mock_executor:
+            mock_executor.return_value.submit.return_value.result.side_effect = KeyboardInterrupt
+
+            with pytest.raises(KeyboardInterrupt):
+                perf_runner_module.run_round(runners)
+
+        for runner in runners:
+            runner.cleanup.assert_called_once_with()
+        mock_executor.return_value.shutdown.assert_called_once_with(wait=True)
+
+    def test_run_multiple_tests_records_exceptions(self, tmp_path):
+        runner = PerfRunner(log_dir=str(tmp_path))
+        def endpoint(dev):
+            return {'ib_name': dev, 'port': 1, 'gid': 'fe80::1'}
+        connections = [
+            {'source': endpoint('hbl_0'), 'destination': endpoint('hbl_1')},
+            {'source': endpoint('hbl_2'), 'destination': endpoint('hbl_3')},
+        ]
+        def fake_run(self):
+            if self.server_ib_dev == 'hbl_2':
+                raise RuntimeError("boom")
+            return True
+
+        with patch.object(PerfRunner, 'run', fake_run):
+            result = runner.run_multiple_tests(connections)
+
+        assert result['summary'] == {'total': 2, 'success': 1, 'failure': 0, 'error': 1}
+        assert result['details'][1]['status'] == 'error'
+        assert result['details'][1]['error'] == 'boom'
+
+    def test_launch_opens_log_before_starting_perf_test(self, runner):
+        with patch.object(runner, 'open_log', side_effect=OSError("No space left on device")), \
+             patch('src.runner.PerfRunner.subprocess.Popen') as mock_popen:
+            with pytest.raises(OSError):
+                runner.launch(['perf_test'], 'server', [], "SERVER")
+
+        mock_popen.assert_not_called()
+
+    def test_output_reactor_allocates_on_first_register(self):
+        reactor = perf_runner_module._OutputReactor()
+        assert reactor._selector is None and reactor._wake_write is None
+
+        process = pipe_process(b"done\n")
+        sink = perf_runner_module._OutputSink([], "SERVER")
+        reactor.register(process.stdout, sink)
+
+        assert sink.done.wait(1)
+        assert reactor._selector is not None
+
+    def test_run_multiple_tests_is_sequential_by_default(self, tmp_path):
+        runner = PerfRunner(log_dir=str(tmp_path), port=20000)
+        def endpoint(dev):
+            return {'ib_name': dev, 'port': 1, 'gid': 'fe80::1'}
+        connections = [{'source': endpoint(f'hbl_{i}'), 'destination': endpoint(f'hbl_{i + 1}')} for i in (0, 2, 4)]
+        slots = []
+        def fake_run(self):
+            slots.append((self.port, self.cpu_slot))
+            return True
+
+        with patch.object(PerfRunner, 'run', fake_run):
+            result = runner.run_multiple_tests(connections)
+
+        assert slots == [(20000, 0)] * 3
+        assert result['summary']['success'] == 3
+        assert perf_runner_module.plan_rounds([{1}, {2}, {3}]) == [[0], [1], [2]]
+
+    def test_analyze_results_sees_errors_beyond_output_tail(self, runner, capsys):
+        tail = perf_runner_module._OUTPUT_TAIL
+        server = pipe_process(b"Server is Listening...\n")
+        # Short filler lines keep the whole output within the pipe buffer
+        client = pipe_process(b"connect FAILED, timeout\n" + b".\n" * (tail + 10) + b"Average Latency: 3.21 [us]\n")
+        runner.server_sink = runner.capture_output(server, runner.server_output, "SERVER")
+        runner.client_sink = runner.capture_output(client, runner.client_output, "CLIENT")
+        assert runner.server_sink.done.wait(1) and runner.client_sink.done.wait(1)
+
+        runner.analyze_results()
+
+        # The error line is no longer in the display tail but still fails the test
+        assert len(runner.client_output) == tail
+        assert "connect FAILED" not in runner.client_output[0]
+        assert runner.test_success is False
+        assert "[CLIENT] connect FAILED, timeout" in capsys.readouterr().out.split("Errors found:")[1]
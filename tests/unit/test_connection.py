@@ -0,0 +1,60 @@
+from collections import namedtuple
+from unittest.mock import MagicMock
+import connection
+
+# Plain attribute bag standing in for a GaudiDevice
+FakeDevice = namedtuple('FakeDevice', 'module_id device_id ib_name bus_id')
+
+
+class TestConnection:
+    def test_print_connection_pairs(self, capsys):
+        src = MagicMock(__str__=lambda self: "hbl_0")
+        dst = MagicMock(__str__=lambda self: "hbl_1")
+
+        connection.print_connection_pairs([(src, 1, dst, 2), (None, 3, dst, 3)])
+
+        assert capsys.readouterr().out == (
+            "Connection pairs established:\n"
+            "  hbl_0 (port 1) <-> hbl_1 (port 2)\n"
+            "  Incomplete connection due to missing device information.\n"
+            "All connections 2 processed.\n"
+        )
+
+    def test_print_gaudi_device_mapping(self, capsys):
+        device = FakeDevice(module_id=0, device_id='hbl_2', ib_name='ibp155s0', bus_id='0000:4d:00.0')
+        gaudidevices = MagicMock()
+        gaudidevices.get_devices.return_value = {"0000:4d:00.0": device}
+
+        assert connection.print_gaudi_device_mapping(gaudidevices) == {0: ('hbl_2', 'ibp155s0')}
+        assert "module_id=0, device_id=hbl_2, ib_name=ibp155s0\n" in capsys.readouterr().out
+
+    def test_connection_resolves_pairs(self, mock_csv_file):
+        dev0 = FakeDevice(module_id=0, device_id=0, ib_name='hbl_0', bus_id='0000:4d:00.0')
+        dev1 = FakeDevice(module_id=1, device_id=1, ib_name='hbl_1', bus_id='0000:4e:00.0')
+        gaudidevices = MagicMock()
+        gaudidevices.get_device_by_module_id.side_effect = {0: dev0, 1: dev1}.get
+
+        pairs = connection.connection(gaudidevices, connection.GaudiRouting(mock_csv_file))
+
+        assert len(pairs) == 4
+        assert pairs[0] == (dev0, 1, dev1, 1)
+        assert pairs[1].src is dev1 and pairs[1].dst is None
+        assert pairs[0].as_dict() == {
+            "src": {"module_id": 0, "device_id": 0, "ib_name": 'hbl_0', "port": 1},
+            "dst": {"module_id": 1, "device_id": 1, "ib_name": 'hbl_1', "port": 1},
+        }
+        assert pairs[1].as_dict()["dst"] == {"module_id": None, "device_id": None, "ib_name": None, "port": 2}
+
+    def test_print_gaudi_device_mapping_orders_by_module_id(self, capsys):
+        devices = {
+            "0000:4d:00.0": FakeDevice(module_id=None, device_id='hbl_0', ib_name='ibp0', bus_id="0000:4d:00.0"),
+            "0000:4e:00.0": FakeDevice(module_id=1, device_id='hbl_1', ib_name='ibp1', bus_id="0000:4e:00.0"),
+            "0000:4f:00.0": FakeDevice(module_id=0, device_id='hbl_2', ib_name='ibp2', bus_id="0000:4f:00.0"),
+        }
+        gaudidevices = MagicMock()
+        gaudidevices.get_devices.return_value = devices
+
+        connection.print_gaudi_device_mapping(gaudidevices)
+
+        lines = capsys.readouterr().out.splitlines()[2:]
+        assert [line.split(',')[0] for line in lines] == ["module_id=0", "module_id=1", "module_id=None"]